@@ -1,102 +1,564 @@
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, g, render_template, request, jsonify
+from flask_socketio import SocketIO, emit, join_room
 import os
 import json
 import socket
+import atexit
+import threading
+import time
+import uuid
+from functools import partial
 from datetime import datetime
 from services.ai_service import AIService
-from services.persistence import PersistenceManager
-from models import Message, Todo, MessageSender, MessageType
+from services.ai_worker import AIWorker
+from services.todo_store import summarize_results
+from services.todo_index import SORT_KEYS
+from services.http_cache import ResponseCache, choose_encoding, etag_matches
+from services.metrics import metrics, SIZE_BUCKETS
+from services.message_bus import create_message_bus, RESYNC_EVENT
+from services.workspace import WorkspaceManager, DEFAULT_WORKSPACE, valid_workspace_id
+from models import Message, Todo, MessageSender, MessageType, TodoStatus, TodoPriority
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Threading mode only: events are emitted from native threads (the AI worker loop and its
+# callback pool, reminder schedulers, the message bus reader), which eventlet/gevent can't serve
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Carries broadcasts to every worker; MESSAGE_BUS=socket for multi-worker deployments
+# (use the json or sqlite storage backend with it, without write-behind)
+bus = create_message_bus()
 
-ai_service = AIService()
-persistence = PersistenceManager()
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '8'))
+# Stream reply text to clients as message_delta events while the model writes it
+AI_STREAMING = os.getenv('AI_STREAMING', '1') != '0'
+
+# CLAUDE_API_URL can point the service at a local stub for testing
+ai_service = AIService(max_connections=AI_MAX_CONCURRENCY, max_keepalive_connections=AI_MAX_CONCURRENCY)
+ai_worker = AIWorker(
+    max_concurrency=AI_MAX_CONCURRENCY,
+    max_pending=int(os.getenv('AI_MAX_PENDING', '64'))
+)
+# Each workspace has its own storage, search/todo indexes, sync log and reminder
+# scheduler, loaded on first use; idle ones beyond the limit are closed.
+# Reminders run in every worker that has the workspace loaded, so they go to local clients only.
+workspaces = WorkspaceManager(
+    root_dir='data',
+    max_loaded=int(os.getenv('WORKSPACE_MAX_LOADED', '32')),
+    on_due=lambda workspace, todo: socketio.emit('todo_due', todo.to_dict(), to=workspace.room),
+    memory_factory=ai_service.create_conversation_memory
+)
+# Workspace of each connected Socket.IO client, by session id
+client_workspaces = {}
+
+# Serialized REST responses, reused until the messages or todos they show change
+response_cache = ResponseCache(max_entries=int(os.getenv('RESPONSE_CACHE_ENTRIES', '256')))
+
+# Number of messages sent with initial_data and the largest page a client may request
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '50'))
+MAX_HISTORY_PAGE_SIZE = 200
+MAX_SEARCH_RESULTS = 100
+
+TURN_SECONDS = metrics.histogram(
+    'todo_app_turn_seconds', 'Chat turn time from receiving a message to broadcasting the reply', ('outcome',))
+TURN_STAGE_SECONDS = metrics.histogram(
+    'todo_app_turn_stage_seconds', 'Time spent in each stage of a chat turn', ('stage',))
+TURN_ERRORS = metrics.counter(
+    'todo_app_turn_errors_total', 'Chat turn failures by stage and exception type', ('stage', 'type'))
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    'todo_app_http_request_seconds', 'REST request handling time', ('endpoint', 'method'))
+HTTP_RESPONSES = metrics.counter(
+    'todo_app_http_responses_total', 'REST responses by status code', ('endpoint', 'status'))
+HTTP_RESPONSE_BYTES = metrics.histogram(
+    'todo_app_http_response_bytes', 'REST response body sizes', ('endpoint',), buckets=SIZE_BUCKETS)
+SOCKET_EVENTS = metrics.counter(
+    'todo_app_socketio_events_total', 'Socket.IO events broadcast to clients', ('event',))
+
+# Read at scrape time, so they cost nothing between scrapes
+metrics.callback('todo_app_ai_pending_calls', 'AI calls queued or running', lambda: ai_worker.pending)
+metrics.callback('todo_app_response_cache_requests_total', 'REST response cache lookups',
+                 lambda: {('hit',): response_cache.hits, ('miss',): response_cache.misses},
+                 metric_type='counter', labelnames=('result',))
+metrics.callback('todo_app_prompt_state_requests_total', 'Reuse of the rendered todo prompt between turns',
+                 lambda: {('hit',): ai_service.prompt_cache_hits, ('miss',): ai_service.prompt_cache_misses},
+                 metric_type='counter', labelnames=('result',))
+metrics.callback('todo_app_conversation_unsummarized_messages', 'Messages waiting to be folded into a conversation summary',
+                 lambda: sum(workspace.memory.stats()['unsummarized'] for workspace in workspaces.loaded()))
+metrics.callback('todo_app_search_documents', 'Messages and todos in the loaded search indexes',
+                 lambda: sum(len(workspace.search_index) for workspace in workspaces.loaded()))
+metrics.callback('todo_app_workspaces_loaded', 'Workspaces held in memory', lambda: workspaces.stats()['loaded'])
+metrics.callback('todo_app_workspace_evictions_total', 'Idle workspaces closed to stay under the limit',
+                 lambda: workspaces.stats()['evictions'], metric_type='counter')
+
+def persistence_cache_stats():
+    totals = {('hit',): 0, ('miss',): 0}
+    for workspace in workspaces.loaded():
+        if hasattr(workspace.persistence, 'cache_stats'):
+            stats = workspace.persistence.cache_stats()
+            totals[('hit',)] += stats['hits']
+            totals[('miss',)] += stats['misses']
+    return totals
+
+metrics.callback('todo_app_persistence_cache_requests_total', 'Storage read cache lookups in loaded workspaces',
+                 persistence_cache_stats, metric_type='counter', labelnames=('result',))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unmatched'
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+    HTTP_RESPONSES.inc(endpoint=endpoint, status=response.status_code)
+    if not response.is_streamed and response.content_length is not None:
+        HTTP_RESPONSE_BYTES.observe(response.content_length, endpoint=endpoint)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of the app's metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def request_workspace_id():
+    """Workspace named by a REST request's ?workspace= parameter or X-Workspace header"""
+    return request.args.get('workspace') or request.headers.get('X-Workspace') or DEFAULT_WORKSPACE
+
+def workspace_lookup_error(workspace_id):
+    """Error response for a REST request naming an invalid or unknown workspace, else None"""
+    if not valid_workspace_id(workspace_id):
+        return jsonify({'error': 'invalid workspace id'}), 400
+    # Read-only endpoints never create workspaces; connecting over Socket.IO does
+    if not workspaces.exists(workspace_id):
+        return jsonify({'error': 'unknown workspace'}), 404
+    return None
+
+def load_history_page(workspace, before_id=None, limit=None):
+    """Load one page of chat history in the shape sent to clients"""
+    limit = min(max(int(limit or HISTORY_PAGE_SIZE), 1), MAX_HISTORY_PAGE_SIZE)
+    messages, has_more = workspace.persistence.load_message_page(before_id, limit)
+    return {
+        'messages': [msg.to_dict() for msg in messages],
+        'has_more': has_more,
+        'before': messages[0].id if messages else None
+    }
+
+def cached_json_response(key, revision, build):
+    """Serve a JSON body from the response cache with ETag/304 and compression"""
+    body = response_cache.get(key, revision, build)
+    encoding = choose_encoding(request.accept_encodings, body)
+    headers = {
+        'ETag': body.etag_for(encoding),
+        'Vary': 'Accept-Encoding, X-Workspace',
+        # Clients may keep the body but must revalidate it on every use
+        'Cache-Control': 'no-cache'
+    }
+    if etag_matches(request.if_none_match, body):
+        return Response(status=304, headers=headers)
+    
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(body.encoded(encoding), mimetype='application/json', headers=headers)
+
 @app.route('/api/messages', methods=['GET'])
 def get_messages():
-    messages = persistence.load_messages()
-    return jsonify([msg.to_dict() for msg in messages])
+    workspace_id = request_workspace_id()
+    error = workspace_lookup_error(workspace_id)
+    if error:
+        return error
+    before = request.args.get('before')
+    try:
+        limit = int(request.args.get('limit') or HISTORY_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    with workspaces.using(workspace_id) as workspace:
+        # Read the revision before the data so a concurrent save can only make the tag older.
+        # The sync epoch changes whenever the workspace is reloaded and counters restart.
+        revision = (workspace.todo_sync.epoch, workspace.message_revision.value)
+        return cached_json_response(
+            ('messages', workspace.id, before, limit),
+            revision,
+            lambda: load_history_page(workspace, before, limit)
+        )
+
+def parse_todo_query(args):
+    """Translate /api/todos query parameters into TodoIndex.query arguments"""
+    def split(name):
+        value = args.get(name)
+        return [part.strip() for part in value.split(',') if part.strip()] if value else []
+    
+    query = {
+        'statuses': [TodoStatus(value) for value in split('status')],
+        'priorities': [TodoPriority(value) for value in split('priority')],
+        'sort': split('sort')
+    }
+    for name in ('due_before', 'due_after'):
+        if args.get(name):
+            query[name] = datetime.fromisoformat(args[name].replace('Z', '+00:00'))
+    if args.get('limit'):
+        query['limit'] = max(int(args['limit']), 0)
+    
+    unknown = [key for key in query['sort'] if key.lstrip('-') not in SORT_KEYS]
+    if unknown:
+        raise ValueError(f"unknown sort key: {', '.join(unknown)}")
+    return query
 
 @app.route('/api/todos', methods=['GET'])
 def get_todos():
-    todos = persistence.load_todos()
-    return jsonify([todo.to_dict() for todo in todos])
+    """List todos, optionally filtered by status/priority/due date, sorted and limited"""
+    workspace_id = request_workspace_id()
+    error = workspace_lookup_error(workspace_id)
+    if error:
+        return error
+    try:
+        query = parse_todo_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    with workspaces.using(workspace_id) as workspace:
+        revision = (workspace.todo_sync.epoch, workspace.todo_sync.revision)
+        return cached_json_response(
+            ('todos', workspace.id, request.query_string),
+            revision,
+            lambda: [todo.to_dict() for todo in workspace.todo_index.query(**query)]
+        )
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """Search message content and todo titles/descriptions, newest first"""
+    workspace_id = request_workspace_id()
+    error = workspace_lookup_error(workspace_id)
+    if error:
+        return error
+    query = request.args.get('q', '')
+    kinds = [kind for kind in request.args.get('type', '').split(',') if kind] or None
+    try:
+        limit = min(max(int(request.args.get('limit', '20')), 1), MAX_SEARCH_RESULTS)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    with workspaces.using(workspace_id) as workspace:
+        results = workspace.search_index.search(query, kinds=kinds, limit=limit)
+    return jsonify({
+        'query': query,
+        'results': [
+            {'type': 'todo', 'todo': record.to_dict()} if isinstance(record, Todo)
+            else {'type': 'message', 'message': record.to_dict()}
+            for record in results
+        ]
+    })
+
+# Events whose effects are in storage, so a worker that misses one can reload instead
+PERSISTED_EVENTS = ('new_message', 'todo_changes')
+
+def broadcast(workspace, event, data):
+    """Send an event to a workspace's clients on every worker; safe outside a Socket.IO handler"""
+    SOCKET_EVENTS.inc(event=event)
+    resync_scope = workspace.id if event in PERSISTED_EVENTS else None
+    bus.publish(event, {'workspace': workspace.id, 'data': data}, resync_scope=resync_scope)
+
+def resync_workspace(workspace, missed):
+    """Rebuild a workspace's in-memory state from storage after this worker missed bus events"""
+    if 'todo_changes' in missed:
+        todos = workspace.persistence.load_todos()
+        workspace.todo_index.rebuild(todos)
+        workspace.reminders.rebuild(todos)
+        workspace.search_index.sync('todo', todos)
+        # Deltas can't describe what was missed, so move clients to a new epoch via a snapshot
+        workspace.todo_sync.reset()
+        socketio.emit('todos_sync', {'snapshot': todo_snapshot(workspace)}, to=workspace.room)
+    if 'new_message' in missed:
+        workspace.search_index.sync('message', workspace.persistence.load_messages())
+        workspace.message_revision.bump()
+
+def deliver_bus_event(event, payload, local):
+    """Apply an event published by this or another worker and emit it to this worker's clients"""
+    if event == RESYNC_EVENT:
+        workspace = workspaces.peek(payload['scope'])
+        if workspace is not None:
+            print(f"Missed bus events {payload['missed']} for workspace {workspace.id}; reloading it from storage")
+            resync_workspace(workspace, payload['missed'])
+        return
+    
+    workspace = workspaces.peek(payload['workspace'])
+    if workspace is None:
+        # No client of this worker uses that workspace; it loads fresh from storage when one does
+        return
+    data = payload['data']
+    
+    if event == 'todo_changes':
+        changed = [Todo.from_dict(todo_data) for todo_data in data['changed']]
+        deleted_ids = data['deleted_ids']
+        workspace.todo_index.apply_changes(changed, deleted_ids)
+        workspace.reminders.apply_changes(changed, deleted_ids)
+        if not local:
+            # The saving worker's persistence already updated its own index
+            for todo in changed:
+                workspace.search_index.upsert(todo)
+            for todo_id in deleted_ids:
+                workspace.search_index.remove('todo', todo_id)
+        # Revisions are per worker, so each one numbers the deltas for its own clients
+        for delta in workspace.todo_sync.record(changed, deleted_ids):
+            socketio.emit(delta.event, delta.to_dict(), to=workspace.room)
+        return
+    
+    if event == 'new_message':
+        # Every worker keeps its own conversation memory, fed by local and remote messages alike
+        workspace.memory.add(data)
+        if not local:
+            workspace.search_index.upsert(Message.from_dict(data))
+            workspace.message_revision.bump()
+    socketio.emit(event, data, to=workspace.room)
+
+bus.subscribe(deliver_bus_event)
+
+def save_message(workspace, message):
+    """Persist a chat message and invalidate cached history responses"""
+    workspace.persistence.append_message(message)
+    workspace.message_revision.bump()
+
+def connected_workspace():
+    """Workspace of the client whose Socket.IO event is being handled"""
+    return client_workspaces.get(request.sid)
+
+def broadcast_error(workspace, content, message_id=None):
+    # Reusing a streamed reply's id lets clients swap the partial text for the error
+    error_message = Message(
+        id=message_id or str(uuid.uuid4()),
+        content=content,
+        sender=MessageSender.ASSISTANT,
+        message_type=MessageType.ERROR
+    )
+    save_message(workspace, error_message)
+    broadcast(workspace, 'new_message', error_message.to_dict())
+
+def timed_ai_call(call, submitted):
+    """Wrap an AI call so its queueing delay and duration are recorded"""
+    async def run():
+        started = time.perf_counter()
+        TURN_STAGE_SECONDS.observe(started - submitted, stage='queue')
+        try:
+            return await call()
+        finally:
+            TURN_STAGE_SECONDS.observe(time.perf_counter() - started, stage='ai_call')
+    return run
 
 @socketio.on('send_message')
 def handle_message(data):
+    received = time.perf_counter()
+    workspace = connected_workspace()
+    if workspace is None:
+        return
+    
     user_message = Message(
         content=data['message'],
         sender=MessageSender.USER
     )
     
     # Save user message
-    messages = persistence.load_messages()
-    messages.append(user_message)
-    persistence.save_messages(messages)
+    with TURN_STAGE_SECONDS.time(stage='save_user_message'):
+        save_message(workspace, user_message)
     
-    # Emit user message to all clients
-    emit('new_message', user_message.to_dict(), broadcast=True)
+    # Emit user message to the workspace's clients
+    with TURN_STAGE_SECONDS.time(stage='broadcast'):
+        broadcast(workspace, 'new_message', user_message.to_dict())
     
-    # Process with AI
+    # Process with AI off the handler thread; complete_turn finishes the turn
+    with TURN_STAGE_SECONDS.time(stage='load_todos'):
+        todos = workspace.persistence.load_todos()
+    message_id = str(uuid.uuid4())
+    if AI_STREAMING:
+        on_delta = lambda text: broadcast(workspace, 'message_delta', {'id': message_id, 'delta': text})
+        call = lambda: ai_service.stream_message(
+            data['message'], todos, on_delta, memory=workspace.memory, message_id=user_message.id)
+    else:
+        call = lambda: ai_service.process_message(
+            data['message'], todos, memory=workspace.memory, message_id=user_message.id)
+    
+    # Keep the workspace loaded until the turn completes, even if its clients leave
+    workspace = workspaces.acquire(workspace.id)
+    call = timed_ai_call(call, time.perf_counter())
+    accepted = ai_worker.submit(call, partial(complete_turn, workspace, message_id=message_id, received=received))
+    if not accepted:
+        workspaces.release(workspace)
+        TURN_ERRORS.inc(stage='queue', type='QueueFull')
+        TURN_SECONDS.observe(time.perf_counter() - received, outcome='rejected')
+        broadcast_error(workspace, "I'm handling a lot of requests right now. Please try again in a moment.")
+
+def complete_turn(workspace, response, error, message_id=None, received=None):
+    """Finish a turn, then unpin its workspace"""
     try:
-        todos = persistence.load_todos()
-        response = ai_service.process_message(data['message'], todos)
-        
-        # Apply todo updates if any
+        apply_turn_result(workspace, response, error, message_id, received)
+    finally:
+        workspaces.release(workspace)
+
+def apply_turn_result(workspace, response, error, message_id=None, received=None):
+    """Persist and broadcast the result of an AI call"""
+    received = received if received is not None else time.perf_counter()
+    if error is not None:
+        print(f"Error processing message: {error}")
+        TURN_ERRORS.inc(stage='ai_call', type=type(error).__name__)
+        TURN_SECONDS.observe(time.perf_counter() - received, outcome='error')
+        broadcast_error(workspace, "I'm having trouble processing that right now. Please try again.", message_id)
+        return
+    
+    stage = 'apply_todos'
+    try:
+        # Apply todo updates if any, against the latest state rather than the
+        # snapshot the model saw, so concurrent turns don't overwrite each other
         if response.todo_updates:
-            todos = ai_service.apply_todo_updates(todos, response.todo_updates)
-            persistence.save_todos(todos)
+            with workspace.todo_write_lock, TURN_STAGE_SECONDS.time(stage=stage):
+                todos = workspace.persistence.load_todos()
+                todos, results = ai_service.apply_todo_batch(todos, response.todo_updates)
+                changed, deleted_ids = summarize_results(results)
+                if changed or deleted_ids:
+                    workspace.persistence.save_todo_changes(changed, deleted_ids)
+                    # Published under the lock so every worker sees changes in save order
+                    broadcast(workspace, 'todo_changes', {
+                        'changed': [todo.to_dict() for todo in changed],
+                        'deleted_ids': deleted_ids
+                    })
         
-        # Create assistant message
+        # Create assistant message; streamed deltas already went out under this id
         assistant_message = Message(
+            id=message_id or str(uuid.uuid4()),
             content=response.message,
             sender=MessageSender.ASSISTANT
         )
         
         # Save assistant message
-        messages.append(assistant_message)
-        persistence.save_messages(messages)
+        stage = 'save_reply'
+        with TURN_STAGE_SECONDS.time(stage=stage):
+            save_message(workspace, assistant_message)
         
         # Emit assistant response
-        emit('new_message', assistant_message.to_dict(), broadcast=True)
-        emit('todos_updated', [todo.to_dict() for todo in todos], broadcast=True)
+        stage = 'broadcast'
+        with TURN_STAGE_SECONDS.time(stage=stage):
+            broadcast(workspace, 'new_message', assistant_message.to_dict())
+        TURN_SECONDS.observe(time.perf_counter() - received, outcome='ok')
         
     except Exception as e:
-        error_message = Message(
-            content="I'm having trouble processing that right now. Please try again.",
-            sender=MessageSender.ASSISTANT,
-            message_type=MessageType.ERROR
-        )
-        messages.append(error_message)
-        persistence.save_messages(messages)
-        emit('new_message', error_message.to_dict(), broadcast=True)
+        print(f"Error completing turn: {e}")
+        TURN_ERRORS.inc(stage=stage, type=type(e).__name__)
+        TURN_SECONDS.observe(time.perf_counter() - received, outcome='error')
+        broadcast_error(workspace, "I'm having trouble processing that right now. Please try again.", message_id)
+
+@socketio.on('load_history')
+def handle_load_history(data):
+    workspace = connected_workspace()
+    if workspace is None:
+        return
+    try:
+        page = load_history_page(workspace, data.get('before'), data.get('limit'))
+    except (AttributeError, ValueError):
+        return
+    emit('history_page', page)
+
+def todo_snapshot(workspace):
+    """Full todo list tagged with the sync position it reflects"""
+    # Read the revision first: a change landing in between is then re-sent as a
+    # delta, which clients apply idempotently
+    todo_sync = workspace.todo_sync
+    epoch, revision = todo_sync.epoch, todo_sync.revision
+    return {
+        'epoch': epoch,
+        'revision': revision,
+        'todos': [todo.to_dict() for todo in workspace.persistence.load_todos()]
+    }
+
+def todo_catch_up(workspace, sync_state):
+    """Deltas a client is missing, or a full snapshot when it is too far behind"""
+    sync_state = sync_state if isinstance(sync_state, dict) else {}
+    epoch, revision = sync_state.get('todo_epoch'), sync_state.get('todo_revision')
+    todo_sync = workspace.todo_sync
+    # Sync state comes from the client; anything malformed just gets a snapshot
+    if isinstance(epoch, str) and isinstance(revision, int) and not isinstance(revision, bool):
+        deltas = todo_sync.deltas_since(epoch, revision)
+    else:
+        deltas = None
+    if deltas is None:
+        return {'snapshot': todo_snapshot(workspace)}
+    return {'epoch': todo_sync.epoch, 'deltas': [{'event': delta.event, **delta.to_dict()} for delta in deltas]}
+
+@socketio.on('sync_todos')
+def handle_sync_todos(data):
+    workspace = connected_workspace()
+    if workspace is not None:
+        emit('todos_sync', todo_catch_up(workspace, data))
 
 @socketio.on('connect')
-def handle_connect():
-    # Send initial data when client connects
-    messages = persistence.load_messages()
-    todos = persistence.load_todos()
-    
-    # Add welcome message if no messages exist
-    if not messages:
-        welcome_message = Message(
-            content="Hello! I'm here to help you manage your todos naturally. You can tell me what you need to do, ask me to prioritize tasks, or just have a conversation about your day.",
-            sender=MessageSender.ASSISTANT
-        )
-        messages.append(welcome_message)
-        persistence.save_messages(messages)
+def handle_connect(auth=None):
+    auth = auth if isinstance(auth, dict) else {}
+    workspace_id = auth.get('workspace') or DEFAULT_WORKSPACE
+    if not valid_workspace_id(workspace_id):
+        return False
     
-    emit('initial_data', {
-        'messages': [msg.to_dict() for msg in messages],
-        'todos': [todo.to_dict() for todo in todos]
-    })
+    # Pinned for as long as the client stays connected
+    workspace = workspaces.acquire(workspace_id)
+    client_workspaces[request.sid] = workspace
+    try:
+        join_room(workspace.room)
+    
+        # Send initial data when client connects
+        history = load_history_page(workspace)
+    
+        # Add welcome message if no messages exist
+        if not history['messages']:
+            welcome_message = Message(
+                content="Hello! I'm here to help you manage your todos naturally. You can tell me what you need to do, ask me to prioritize tasks, or just have a conversation about your day.",
+                sender=MessageSender.ASSISTANT
+            )
+            save_message(workspace, welcome_message)
+            history['messages'].append(welcome_message.to_dict())
+            history['before'] = welcome_message.id
+    
+        emit('initial_data', {
+            'messages': history['messages'],
+            'has_more': history['has_more'],
+            'before': history['before'],
+            'todo_sync': todo_catch_up(workspace, auth)
+        })
+    except Exception:
+        # The client never finished connecting, so no disconnect will unpin it
+        client_workspaces.pop(request.sid, None)
+        workspaces.release(workspace)
+        raise
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    workspace = client_workspaces.pop(request.sid, None)
+    if workspace is not None:
+        workspaces.release(workspace)
+
+_shutdown_lock = threading.Lock()
+_shut_down = False
+
+@atexit.register
+def shutdown():
+    """Close the shared HTTP client, stop the AI worker loop and message bus, and close workspaces.
+
+    Safe to call more than once; scripts call it directly and atexit calls it again.
+    """
+    global _shut_down
+    with _shutdown_lock:
+        if _shut_down:
+            return
+        _shut_down = True
+    
+    if ai_worker.running:
+        try:
+            ai_worker.run_coroutine(ai_service.aclose(), timeout=5)
+        except Exception as e:
+            print(f"Error closing AI client: {e!r}")
+    ai_worker.close()
+    workspaces.close_all()
+    bus.close()
 
 def find_available_port(start_port=5000):
     """Find an available port starting from start_port"""
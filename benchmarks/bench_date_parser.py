@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: phrase extraction + per-phrase parsing vs. the single-pass
+DATE_PATTERN engine used by AIService._enhance_message_with_date_parsing.
+
+The legacy path calls the uncached parser, as it ran before memoization. The
+engine is timed both without its per-day cache (cache_size=0) and with it.
+
+Run from the repository root: python benchmarks/bench_date_parser.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.date_parser import DateParser
+
+MESSAGES = [
+    "Add a todo to call mom tomorrow",
+    "Remind me to buy groceries next friday and pay rent on 11/1",
+    "I need to finish the report in 3 days, review it 5 days from now and ship by 2026-12-15",
+    "What should I prioritize today?",
+    "Move the dentist appointment to monday, the car service to 12/03/2026 and the call to next week",
+    "Just chatting, nothing date related in this one at all, but it is a fairly long message about my day",
+]
+
+def legacy(parser, message):
+    results = []
+    for phrase in parser.extract_date_phrases(message):
+        parsed = parser._parse_natural_language_date(phrase)
+        if parsed:
+            results.append((phrase, parsed))
+    return results
+
+def engine(parser, message):
+    return [(span.text, span.value) for span in parser.extract_date_spans(message) if span.value]
+
+def main():
+    number = 20000
+
+    for name, func, parser in (("legacy", legacy, DateParser(cache_size=0)),
+                               ("engine, no cache", engine, DateParser(cache_size=0)),
+                               ("engine, cached", engine, DateParser())):
+        elapsed = timeit.timeit(lambda: [func(parser, m) for m in MESSAGES], number=number)
+        per_message_us = elapsed / (number * len(MESSAGES)) * 1e6
+        print(f"{name:>16}: {per_message_us:7.2f} us/message")
+
+if __name__ == '__main__':
+    main()
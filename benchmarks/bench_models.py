@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the model layer: memory held by 100k todos (slotted models vs.
+an equivalent dict-backed dataclass), construction cost, and encode/decode
+throughput of the bulk codec vs. the per-record to_dict()/from_dict() path.
+
+Records cache their serialized form, so encoding is reported twice: cold, on
+freshly decoded todos as after a load, and warm, re-encoding todos that were
+already encoded and not modified since.
+
+Run from the repository root: python benchmarks/bench_models.py
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Todo, TodoPriority, TodoStatus, encode_todos, decode_todos
+
+COUNT = 100_000
+
+@dataclass
+class DictTodo:
+    """Same fields as Todo, without __slots__, for the memory baseline"""
+    title: str
+    id: str
+    description: Optional[str] = None
+    priority: TodoPriority = TodoPriority.MEDIUM
+    status: TodoStatus = TodoStatus.PENDING
+    created_date: datetime = field(default_factory=datetime.now)
+    due_date: Optional[datetime] = None
+    completed_date: Optional[datetime] = None
+
+def make_todos(cls, count):
+    base = datetime(2026, 1, 1)
+    priorities = list(TodoPriority)
+    return [
+        cls(
+            title=f"Todo number {i}",
+            id=f"{i:08d}-0000-4000-8000-000000000000",
+            description="Some details" if i % 3 == 0 else None,
+            priority=priorities[i % 4],
+            created_date=base + timedelta(minutes=i),
+            due_date=base + timedelta(days=i % 30) if i % 2 else None
+        )
+        for i in range(count)
+    ]
+
+def measure_memory(cls):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    todos = make_todos(cls, COUNT)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(todos), todos
+
+def timed(func, repeat=3, setup=None):
+    """Best of `repeat` runs; `setup` builds a fresh argument for each run, outside the timing"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    slotted_bytes, todos = measure_memory(Todo)
+    dict_bytes, _ = measure_memory(DictTodo)
+    print(f"memory per todo: slotted {slotted_bytes:6.0f} B, dict-backed {dict_bytes:6.0f} B "
+          f"({COUNT:,} todos: {slotted_bytes * COUNT / 2**20:.1f} MiB vs {dict_bytes * COUNT / 2**20:.1f} MiB)")
+
+    construct, _ = timed(lambda: make_todos(Todo, COUNT))
+    print(f"construction: {construct / COUNT * 1e6:.1f} us per todo")
+
+    def legacy_encode_todos(todos):
+        return json.dumps([t.to_dict() for t in todos], ensure_ascii=False).encode('utf-8')
+
+    codec_bytes = encode_todos(todos)
+    fresh = lambda: decode_todos(codec_bytes)
+    legacy_cold, legacy_bytes = timed(legacy_encode_todos, setup=fresh)
+    codec_cold, _ = timed(encode_todos, setup=fresh)
+    legacy_warm, _ = timed(lambda: legacy_encode_todos(todos))
+    codec_warm, _ = timed(lambda: encode_todos(todos))
+    legacy_decode, _ = timed(lambda: [Todo.from_dict(d) for d in json.loads(legacy_bytes)])
+    codec_decode, decoded = timed(lambda: decode_todos(codec_bytes))
+    assert decoded == todos
+
+    for name, legacy, codec in (("cold encode", legacy_cold, codec_cold), ("warm encode", legacy_warm, codec_warm),
+                                ("decode", legacy_decode, codec_decode)):
+        print(f"{name:>11}: to_dict/from_dict {COUNT / legacy:9,.0f} todos/s, codec {COUNT / codec:9,.0f} todos/s "
+              f"({legacy / codec:.2f}x)")
+
+if __name__ == '__main__':
+    main()
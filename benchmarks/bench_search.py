@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the full-text search index: time to rebuild over 100k messages
+and lookup latency for exact, multi-term and prefix queries, compared with a
+linear scan of the message list.
+
+Run from the repository root: python benchmarks/bench_search.py
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Message, MessageSender
+from services.search_index import SearchIndex
+
+COUNT = 100_000
+QUERIES = ["dentist", "call mom", "groc", "report friday", "meeting tomorrow", "a"]
+
+def make_messages(count):
+    rng = random.Random(42)
+    words = ("remind me to call mom about the dentist appointment tomorrow buy groceries "
+             "finish the quarterly report by friday schedule team meeting pick up laundry "
+             "book flights renew passport water plants pay rent").split()
+    # Some rarer words so the vocabulary has a realistic long tail
+    words += [f"project{i}" for i in range(2000)]
+    base = datetime(2026, 1, 1)
+    return [
+        Message(
+            content=" ".join(rng.choice(words) for _ in range(rng.randint(4, 16))),
+            sender=MessageSender.USER if i % 2 == 0 else MessageSender.ASSISTANT,
+            timestamp=base + timedelta(minutes=i)
+        )
+        for i in range(count)
+    ]
+
+def linear_search(messages, query, limit=20):
+    terms = query.casefold().split()
+    results = []
+    for message in reversed(messages):
+        text = message.content.casefold()
+        if all(term in text for term in terms):
+            results.append(message)
+            if len(results) == limit:
+                break
+    return results
+
+def per_query(func, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    messages = make_messages(COUNT)
+    index = SearchIndex()
+
+    start = time.perf_counter()
+    index.rebuild(messages, [])
+    print(f"rebuild: {COUNT:,} messages in {time.perf_counter() - start:.2f}s")
+
+    for query in QUERIES:
+        indexed = per_query(lambda: index.search(query))
+        scanned = per_query(lambda: linear_search(messages, query), repeat=5)
+        print(f"{query!r:20} index {indexed * 1e3:7.3f} ms, linear scan {scanned * 1e3:8.3f} ms")
+
+    new_message = Message(content="remember the dentist moved to thursday", sender=MessageSender.USER)
+    start = time.perf_counter()
+    index.upsert(new_message)
+    print(f"incremental upsert: {(time.perf_counter() - start) * 1e6:.0f} us")
+    assert index.search("dentist thurs")[0] is new_message
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Claude Messages API (POST /v1/messages) for offline
+benchmarks. Supports plain JSON and SSE streaming replies, a configurable
+time to first token and per-chunk delay, and canned TODO_UPDATES payloads.
+
+Point the app at it with CLAUDE_API_URL=http://127.0.0.1:<port>/v1/messages
+(and any non-empty CLAUDE_API_KEY).
+
+Run standalone: python benchmarks/fake_claude.py --port 8089 --latency 0.3
+"""
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+# Echoed back in the reply so a load generator can match replies to turns
+TURN_TAG = re.compile(r"\[turn:([\w-]+)\]")
+
+CANNED_UPDATES = [
+    None,
+    [{"action": "add", "title": "Benchmark todo", "priority": "medium"}],
+    None,
+    [{"action": "add", "title": "Urgent benchmark todo", "priority": "urgent",
+      "dueDate": "2030-01-01T09:00:00"}],
+]
+
+class FakeClaudeServer:
+    """Threaded HTTP server answering like the Messages API"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 chunk_delay: float = 0.0, chunks: int = 8, reply_words: int = 40,
+                 todo_updates: Optional[List[Optional[list]]] = None):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.reply_words = reply_words
+        self._updates = itertools.cycle(todo_updates if todo_updates is not None else CANNED_UPDATES)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                server.handle(self, body)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/messages"
+
+    def start(self) -> "FakeClaudeServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-claude", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reply_text(self, body: dict) -> str:
+        with self._lock:
+            self.requests += 1
+            updates = next(self._updates)
+
+        messages = body.get("messages") or [{}]
+        content = messages[-1].get("content", "")
+        if isinstance(content, list):
+            content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+        # The newest message comes last when the app merges queued user messages into one turn
+        tags = TURN_TAG.findall(content)
+
+        words = " ".join(["sure"] * self.reply_words)
+        text = f"[turn:{tags[-1]}] {words}" if tags else words
+        if updates:
+            text += "\n\nTODO_UPDATES:\n" + json.dumps({"updates": updates})
+        return text
+
+    def handle(self, handler: BaseHTTPRequestHandler, body: dict) -> None:
+        text = self.reply_text(body)
+        usage = {"input_tokens": 400, "output_tokens": len(text) // 4,
+                 "cache_read_input_tokens": 350, "cache_creation_input_tokens": 0}
+        time.sleep(self.latency)
+
+        if not body.get("stream"):
+            payload = json.dumps({
+                "id": "msg_fake", "type": "message", "role": "assistant", "model": body.get("model"),
+                "content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "usage": usage
+            }).encode("utf-8")
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send(event: dict) -> None:
+            data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+            handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            handler.wfile.flush()
+
+        send({"type": "message_start", "message": {"id": "msg_fake", "usage": dict(usage, output_tokens=1)}})
+        send({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+        size = max(1, -(-len(text) // self.chunks))
+        for start in range(0, len(text), size):
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            send({"type": "content_block_delta", "index": 0,
+                  "delta": {"type": "text_delta", "text": text[start:start + size]}})
+        send({"type": "content_block_stop", "index": 0})
+        send({"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": usage["output_tokens"]}})
+        send({"type": "message_stop"})
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first byte")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="seconds between streamed chunks")
+    parser.add_argument("--chunks", type=int, default=8)
+    args = parser.parse_args()
+
+    server = FakeClaudeServer(args.host, args.port, args.latency, args.chunk_delay, args.chunks).start()
+    print(f"Fake Claude API listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Offline load test: drives concurrent Socket.IO clients through connect and
+send_message against the real app, with the Claude API replaced by the local
+fake in benchmarks/fake_claude.py. Reports connect and turn latency
+percentiles, events delivered per second and peak memory for each history
+size.
+
+Each history size runs in a fresh subprocess with its own data directory
+seeded with that many messages, so results don't leak between runs.
+
+Run from the repository root:
+    python benchmarks/load_test.py --history 10,1000,10000,100000 --clients 20 --turns 5
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def seed_history(data_dir, count):
+    from models import Message, MessageSender, encode_messages
+
+    base = datetime(2026, 1, 1)
+    messages = [
+        Message(
+            content=f"Seeded message {i}: remember to water the plants and call the dentist",
+            sender=MessageSender.USER if i % 2 == 0 else MessageSender.ASSISTANT,
+            timestamp=base + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "messages.json"), "wb") as f:
+        f.write(encode_messages(messages))
+
+def drive_client(client, turns, timeout, latencies, counters, lock):
+    """Send `turns` messages one after another, waiting for each reply"""
+    received = 0
+    lost = 0
+    for _ in range(turns):
+        tag = f"[turn:{uuid.uuid4().hex[:12]}]"
+        started = time.perf_counter()
+        client.emit('send_message', {'message': f"{tag} add a todo to review the quarterly report tomorrow"})
+
+        done = False
+        deadline = started + timeout
+        while not done and time.perf_counter() < deadline:
+            events = client.get_received()
+            received += len(events)
+            for event in events:
+                args = event.get('args') or [{}]
+                message = args[0] if isinstance(args[0], dict) else {}
+                if event['name'] == 'new_message' and message.get('sender') == 'assistant' \
+                        and message.get('content', '').startswith(tag):
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                    done = True
+            if not done:
+                time.sleep(0.001)
+        if not done:
+            lost += 1
+
+    received += len(client.get_received())
+    with lock:
+        counters['events'] += received
+        counters['lost'] += lost
+
+def run_one(args):
+    """Benchmark a single history size in this process and print a JSON result line"""
+    from fake_claude import FakeClaudeServer
+
+    workdir = tempfile.mkdtemp(prefix="todo-load-")
+    seed_history(os.path.join(workdir, "data"), args.run_one)
+
+    fake = FakeClaudeServer(latency=args.latency, chunk_delay=args.chunk_delay).start()
+    os.environ.update({
+        'CLAUDE_API_URL': fake.url,
+        'CLAUDE_API_KEY': os.environ.get('CLAUDE_API_KEY') or 'fake-key',
+        'AI_STREAMING': '1' if args.streaming else '0',
+        'TODO_STORAGE': args.storage,
+        'AI_MAX_PENDING': str(max(64, args.clients * 2))
+    })
+    os.chdir(workdir)
+
+    started = time.perf_counter()
+    import app
+    startup = time.perf_counter() - started
+
+    connect_times = []
+    clients = []
+    for _ in range(args.clients):
+        connect_started = time.perf_counter()
+        client = app.socketio.test_client(app.app)
+        client.get_received()  # initial_data
+        connect_times.append(time.perf_counter() - connect_started)
+        clients.append(client)
+
+    latencies = []
+    counters = {'events': 0, 'lost': 0}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=drive_client, args=(client, args.turns, args.timeout, latencies, counters, lock))
+        for client in clients
+    ]
+    run_started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - run_started
+
+    for client in clients:
+        client.disconnect()
+    app.shutdown()
+    fake.stop()
+
+    print(json.dumps({
+        'history': args.run_one,
+        'startup_s': startup,
+        'connect_p50_ms': percentile(connect_times, 0.5) * 1000,
+        'turns': len(latencies),
+        'lost': counters['lost'],
+        'turn_p50_ms': percentile(latencies, 0.5) * 1000,
+        'turn_p99_ms': percentile(latencies, 0.99) * 1000,
+        'events_per_s': counters['events'] / elapsed if elapsed else 0.0,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history', default='10,1000,10000,100000', help='comma-separated history sizes')
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=5, help='messages sent by each client')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake API time to first byte, seconds')
+    parser.add_argument('--chunk-delay', type=float, default=0.005, help='fake API delay between streamed chunks')
+    parser.add_argument('--no-streaming', dest='streaming', action='store_false')
+    parser.add_argument('--storage', default='json', choices=['json', 'journal', 'sqlite'])
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds to wait for each reply')
+    parser.add_argument('--run-one', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one is not None:
+        run_one(args)
+        return
+
+    print(f"{args.clients} clients x {args.turns} turns, storage={args.storage}, "
+          f"streaming={'on' if args.streaming else 'off'}, fake latency {args.latency * 1000:.0f} ms")
+    print(f"{'history':>8} {'startup':>9} {'connect p50':>12} {'turn p50':>10} {'turn p99':>10} "
+          f"{'events/s':>10} {'max RSS':>9} {'lost':>5}")
+
+    passthrough = [
+        '--clients', str(args.clients), '--turns', str(args.turns), '--latency', str(args.latency),
+        '--chunk-delay', str(args.chunk_delay), '--storage', args.storage, '--timeout', str(args.timeout)
+    ] + ([] if args.streaming else ['--no-streaming'])
+    for size in [int(value) for value in args.history.split(',') if value]:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run-one', str(size)] + passthrough,
+            capture_output=True, text=True, cwd=REPO_ROOT
+        )
+        lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+        if output.returncode != 0 or not lines:
+            print(f"{size:>8} failed:\n{output.stderr[-2000:]}")
+            continue
+        result = json.loads(lines[-1])
+        print(f"{size:>8} {result['startup_s']:>8.2f}s {result['connect_p50_ms']:>10.1f}ms "
+              f"{result['turn_p50_ms']:>8.1f}ms {result['turn_p99_ms']:>8.1f}ms "
+              f"{result['events_per_s']:>10.0f} {result['max_rss_mb']:>7.0f}MB {result['lost']:>5}")
+
+if __name__ == '__main__':
+    main()
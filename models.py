@@ -1,7 +1,9 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+import json
+import operator
 import uuid
 
 class TodoPriority(Enum):
@@ -12,21 +14,11 @@ class TodoPriority(Enum):
     
     @property
     def display_name(self) -> str:
-        return {
-            TodoPriority.LOW: "Low",
-            TodoPriority.MEDIUM: "Medium", 
-            TodoPriority.HIGH: "High",
-            TodoPriority.URGENT: "Urgent"
-        }[self]
+        return _PRIORITY_DISPLAY_NAMES[self]
     
     @property
     def sort_order(self) -> int:
-        return {
-            TodoPriority.LOW: 1,
-            TodoPriority.MEDIUM: 2,
-            TodoPriority.HIGH: 3,
-            TodoPriority.URGENT: 4
-        }[self]
+        return _PRIORITY_SORT_ORDER[self]
 
 class TodoStatus(Enum):
     PENDING = "pending"
@@ -35,11 +27,26 @@ class TodoStatus(Enum):
     
     @property
     def display_name(self) -> str:
-        return {
-            TodoStatus.PENDING: "Pending",
-            TodoStatus.IN_PROGRESS: "In Progress",
-            TodoStatus.COMPLETED: "Completed"
-        }[self]
+        return _STATUS_DISPLAY_NAMES[self]
+
+# Lookup tables built once instead of on every property access
+_PRIORITY_DISPLAY_NAMES = {
+    TodoPriority.LOW: "Low",
+    TodoPriority.MEDIUM: "Medium",
+    TodoPriority.HIGH: "High",
+    TodoPriority.URGENT: "Urgent"
+}
+_PRIORITY_SORT_ORDER = {
+    TodoPriority.LOW: 1,
+    TodoPriority.MEDIUM: 2,
+    TodoPriority.HIGH: 3,
+    TodoPriority.URGENT: 4
+}
+_STATUS_DISPLAY_NAMES = {
+    TodoStatus.PENDING: "Pending",
+    TodoStatus.IN_PROGRESS: "In Progress",
+    TodoStatus.COMPLETED: "Completed"
+}
 
 class MessageSender(Enum):
     USER = "user"
@@ -51,8 +58,84 @@ class MessageType(Enum):
     TODO_UPDATE = "todo_update"
     ERROR = "error"
 
-@dataclass
-class Todo:
+_encode_str = json.encoder.encode_basestring
+
+def _encode_optional_str(value: Optional[str]) -> str:
+    return _encode_str(value) if value is not None else 'null'
+
+class _SerializedRecord:
+    """Caches a record's to_dict() and JSON forms for its current field values.
+
+    Each version of a record is serialized at most once and the result is
+    shared by storage, prompts and Socket.IO events. Methods that change a
+    record, like mark_completed(), drop the cache, and so does assigning one
+    of the fields named in _serialized_fields. Construction, decoding and
+    reads go straight to the slots. Copies keep the cache, since they start
+    out with the same values.
+    """
+    __slots__ = ()
+    # Names that reach every slot without an invalidating setter, set by _serialized_fields
+    _slot_names: Tuple[str, ...] = ()
+
+    def __copy__(self):
+        clone = object.__new__(type(self))
+        for name in self._slot_names:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+    def _clear_cache(self) -> None:
+        self._dict = None
+        self._json = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = self._dict
+        if record is None:
+            record = self._build_dict()
+            self._dict = record
+        # Callers own the returned dict; the cached one stays untouched
+        return dict(record)
+
+    def to_json(self) -> str:
+        """Compact JSON object with the same content as to_dict()"""
+        text = self._json
+        if text is None:
+            record = self._dict
+            if record is None:
+                record = self._build_dict()
+                self._dict = record
+            text = self._build_json(record)
+            self._json = text
+        return text
+
+def _serialized_fields(*assignable: str):
+    """Class decorator for _SerializedRecord dataclasses.
+
+    Each field in `assignable` becomes a property whose setter drops the
+    cache. Its slot stays reachable as `_raw_<name>`, which constructors and
+    decoders assign directly, and reads go through a C-level attrgetter.
+    """
+    def wrap(cls):
+        slot_names = []
+        for name in cls.__slots__:
+            if name in assignable:
+                raw_name = f"_raw_{name}"
+                setattr(cls, raw_name, cls.__dict__[name])
+                setattr(cls, name, property(operator.attrgetter(raw_name), _invalidating_setter(raw_name)))
+                name = raw_name
+            slot_names.append(name)
+        cls._slot_names = tuple(slot_names)
+        return cls
+    return wrap
+
+def _invalidating_setter(raw_name: str):
+    def setter(self, value):
+        setattr(self, raw_name, value)
+        self._clear_cache()
+    return setter
+
+@_serialized_fields('title', 'description', 'priority', 'status', 'due_date', 'completed_date')
+@dataclass(slots=True, init=False)
+class Todo(_SerializedRecord):
     title: str
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     description: Optional[str] = None
@@ -61,20 +144,39 @@ class Todo:
     created_date: datetime = field(default_factory=datetime.now)
     due_date: Optional[datetime] = None
     completed_date: Optional[datetime] = None
+    _dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    _json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __init__(self, title: str, id: Optional[str] = None, description: Optional[str] = None,
+                 priority: TodoPriority = TodoPriority.MEDIUM, status: TodoStatus = TodoStatus.PENDING,
+                 created_date: Optional[datetime] = None, due_date: Optional[datetime] = None,
+                 completed_date: Optional[datetime] = None):
+        self.id = str(uuid.uuid4()) if id is None else id
+        self._raw_title = title
+        self._raw_description = description
+        self._raw_priority = priority
+        self._raw_status = status
+        self.created_date = datetime.now() if created_date is None else created_date
+        self._raw_due_date = due_date
+        self._raw_completed_date = completed_date
+        self._dict = None
+        self._json = None
     
     def mark_completed(self) -> None:
-        self.status = TodoStatus.COMPLETED
-        self.completed_date = datetime.now()
+        self._set_status(TodoStatus.COMPLETED, datetime.now())
     
     def mark_in_progress(self) -> None:
-        self.status = TodoStatus.IN_PROGRESS
-        self.completed_date = None
+        self._set_status(TodoStatus.IN_PROGRESS, None)
     
     def mark_pending(self) -> None:
-        self.status = TodoStatus.PENDING
-        self.completed_date = None
+        self._set_status(TodoStatus.PENDING, None)
     
-    def to_dict(self) -> Dict[str, Any]:
+    def _set_status(self, status: TodoStatus, completed_date: Optional[datetime]) -> None:
+        self._raw_status = status
+        self._raw_completed_date = completed_date
+        self._clear_cache()
+    
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             'id': self.id,
             'title': self.title,
@@ -86,33 +188,46 @@ class Todo:
             'completed_date': self.completed_date.isoformat() if self.completed_date else None
         }
     
+    @staticmethod
+    def _build_json(record: Dict[str, Any]) -> str:
+        return (
+            '{"id":' + _encode_str(record['id'])
+            + ',"title":' + _encode_str(record['title'])
+            + ',"description":' + _encode_optional_str(record['description'])
+            + ',"priority":"' + record['priority']
+            + '","status":"' + record['status']
+            + '","created_date":"' + record['created_date']
+            + '","due_date":' + _encode_optional_str(record['due_date'])
+            + ',"completed_date":' + _encode_optional_str(record['completed_date'])
+            + '}'
+        )
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Todo':
-        todo = cls(
-            id=data['id'],
-            title=data['title'],
-            description=data.get('description'),
-            priority=TodoPriority(data['priority']),
-            status=TodoStatus(data['status']),
-            created_date=datetime.fromisoformat(data['created_date'])
+        return _new_todo(
+            data['id'],
+            data['title'],
+            data.get('description'),
+            TodoPriority(data['priority']),
+            TodoStatus(data['status']),
+            datetime.fromisoformat(data['created_date']),
+            _parse_optional_datetime(data.get('due_date')),
+            _parse_optional_datetime(data.get('completed_date'))
         )
-        
-        if data.get('due_date'):
-            todo.due_date = datetime.fromisoformat(data['due_date'])
-        if data.get('completed_date'):
-            todo.completed_date = datetime.fromisoformat(data['completed_date'])
-            
-        return todo
-
-@dataclass
-class Message:
+
+# Messages are never edited after creation, so no field needs an invalidating setter
+@_serialized_fields()
+@dataclass(slots=True)
+class Message(_SerializedRecord):
     content: str
     sender: MessageSender
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     timestamp: datetime = field(default_factory=datetime.now)
     message_type: MessageType = MessageType.TEXT
+    _dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    _json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
-    def to_dict(self) -> Dict[str, Any]:
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             'id': self.id,
             'content': self.content,
@@ -121,17 +236,28 @@ class Message:
             'message_type': self.message_type.value if isinstance(self.message_type, MessageType) else self.message_type
         }
     
+    @staticmethod
+    def _build_json(record: Dict[str, Any]) -> str:
+        return (
+            '{"id":' + _encode_str(record['id'])
+            + ',"content":' + _encode_str(record['content'])
+            + ',"sender":"' + record['sender']
+            + '","timestamp":"' + record['timestamp']
+            + '","message_type":"' + record['message_type']
+            + '"}'
+        )
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Message':
-        return cls(
-            id=data['id'],
-            content=data['content'],
-            sender=MessageSender(data['sender']),
-            timestamp=datetime.fromisoformat(data['timestamp']),
-            message_type=MessageType(data.get('message_type', 'text'))
+        return _new_message(
+            data['id'],
+            data['content'],
+            MessageSender(data['sender']),
+            datetime.fromisoformat(data['timestamp']),
+            MessageType(data.get('message_type', 'text'))
         )
 
-@dataclass
+@dataclass(slots=True)
 class TodoUpdate:
     action: str  # add, update, complete, delete
     todo_id: Optional[str] = None
@@ -140,7 +266,120 @@ class TodoUpdate:
     priority: Optional[TodoPriority] = None
     due_date: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class AIResponse:
     message: str
-    todo_updates: Optional[List[TodoUpdate]] = None
\ No newline at end of file
+    todo_updates: Optional[List[TodoUpdate]] = None
+
+# Bulk JSON codec: encodes records from their cached JSON forms and decodes
+# each object's key/value pairs straight into a model, skipping the
+# per-record from_dict() dictionaries. Output is the same JSON array of
+# objects that to_dict() produces, written compactly.
+
+_PRIORITY_BY_VALUE = {priority.value: priority for priority in TodoPriority}
+_STATUS_BY_VALUE = {status.value: status for status in TodoStatus}
+_SENDER_BY_VALUE = {sender.value: sender for sender in MessageSender}
+_MESSAGE_TYPE_BY_VALUE = {message_type.value: message_type for message_type in MessageType}
+
+def _parse_optional_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+def encode_records(records: List[_SerializedRecord]) -> bytes:
+    return ('[' + ','.join([record.to_json() for record in records]) + ']').encode('utf-8')
+
+def encode_todos(todos: List[Todo]) -> bytes:
+    return encode_records(todos)
+
+def _new_todo(id: str, title: str, description: Optional[str], priority: TodoPriority, status: TodoStatus,
+              created_date: datetime, due_date: Optional[datetime], completed_date: Optional[datetime]) -> Todo:
+    """Build a Todo from decoded values without going through __init__"""
+    todo = Todo.__new__(Todo)
+    todo.id = id
+    todo._raw_title = title
+    todo._raw_description = description
+    todo._raw_priority = priority
+    todo._raw_status = status
+    todo.created_date = created_date
+    todo._raw_due_date = due_date
+    todo._raw_completed_date = completed_date
+    todo._dict = None
+    todo._json = None
+    return todo
+
+def _new_message(id: str, content: str, sender: MessageSender, timestamp: datetime,
+                 message_type: MessageType) -> Message:
+    """Build a Message from decoded values without going through __init__"""
+    message = Message.__new__(Message)
+    message.id = id
+    message.content = content
+    message.sender = sender
+    message.timestamp = timestamp
+    message.message_type = message_type
+    message._dict = None
+    message._json = None
+    return message
+
+def _todo_from_pairs(pairs: List[Tuple[str, Any]]) -> Todo:
+    todo = Todo.__new__(Todo)
+    todo._raw_description = None
+    todo._raw_due_date = None
+    todo._raw_completed_date = None
+    todo._dict = None
+    todo._json = None
+    for key, value in pairs:
+        if key == 'id':
+            todo.id = value
+        elif key == 'title':
+            todo._raw_title = value
+        elif key == 'description':
+            todo._raw_description = value
+        elif key == 'priority':
+            todo._raw_priority = _PRIORITY_BY_VALUE[value]
+        elif key == 'status':
+            todo._raw_status = _STATUS_BY_VALUE[value]
+        elif key == 'created_date':
+            todo.created_date = datetime.fromisoformat(value)
+        elif key == 'due_date':
+            todo._raw_due_date = _parse_optional_datetime(value)
+        elif key == 'completed_date':
+            todo._raw_completed_date = _parse_optional_datetime(value)
+    try:
+        todo.id, todo.title, todo.priority, todo.status, todo.created_date
+    except AttributeError as e:
+        raise KeyError(f"todo record is missing a field: {e}")
+    return todo
+
+_todo_decoder = json.JSONDecoder(object_pairs_hook=_todo_from_pairs)
+
+def decode_todos(data: bytes) -> List[Todo]:
+    return _todo_decoder.decode(data.decode('utf-8'))
+
+def encode_messages(messages: List[Message]) -> bytes:
+    return encode_records(messages)
+
+def _message_from_pairs(pairs: List[Tuple[str, Any]]) -> Message:
+    message = Message.__new__(Message)
+    message.message_type = MessageType.TEXT
+    message._dict = None
+    message._json = None
+    for key, value in pairs:
+        if key == 'id':
+            message.id = value
+        elif key == 'content':
+            message.content = value
+        elif key == 'sender':
+            message.sender = _SENDER_BY_VALUE[value]
+        elif key == 'timestamp':
+            message.timestamp = datetime.fromisoformat(value)
+        elif key == 'message_type':
+            message.message_type = _MESSAGE_TYPE_BY_VALUE[value or 'text']
+    try:
+        message.id, message.content, message.sender, message.timestamp
+    except AttributeError as e:
+        raise KeyError(f"message record is missing a field: {e}")
+    return message
+
+_message_decoder = json.JSONDecoder(object_pairs_hook=_message_from_pairs)
+
+def decode_messages(data: bytes) -> List[Message]:
+    return _message_decoder.decode(data.decode('utf-8'))
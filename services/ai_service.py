@@ -1,153 +1,440 @@
+import asyncio
 import os
 import json
+import hashlib
+import time
 import httpx
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Callable
 from datetime import datetime
 from models import Todo, TodoUpdate, AIResponse, TodoPriority, TodoStatus
 from services.date_parser import DateParser
+from services.response_stream import ResponseStreamParser, iter_sse_events
+from services.prompt_builder import TodoPromptBuilder, TodoPromptState
+from services.todo_store import TodoStore, UpdateResult
+from services.conversation_memory import ConversationMemory, ConversationContext
+from services.metrics import metrics, SIZE_BUCKETS
+
+CLAUDE_REQUEST_SECONDS = metrics.histogram(
+    'todo_app_claude_request_seconds', 'Claude API round-trip time, to the end of the response', ('mode',))
+CLAUDE_FIRST_TOKEN_SECONDS = metrics.histogram(
+    'todo_app_claude_first_token_seconds', 'Time until the first streamed reply text arrived')
+CLAUDE_PARSE_SECONDS = metrics.histogram(
+    'todo_app_claude_parse_seconds', 'Time spent parsing Claude responses and todo updates')
+CLAUDE_RESPONSES = metrics.counter(
+    'todo_app_claude_responses_total', 'Claude API responses by HTTP status code', ('status',))
+CLAUDE_ERRORS = metrics.counter(
+    'todo_app_claude_errors_total', 'Failed Claude API calls by reason', ('reason',))
+CLAUDE_TOKENS = metrics.counter(
+    'todo_app_claude_tokens_total', 'Tokens reported in Claude API usage', ('type',))
+CLAUDE_REQUEST_BYTES = metrics.histogram(
+    'todo_app_claude_request_bytes', 'Size of Claude API request bodies', buckets=SIZE_BUCKETS)
+CLAUDE_RESPONSE_BYTES = metrics.histogram(
+    'todo_app_claude_response_bytes', 'Size of Claude API response bodies', buckets=SIZE_BUCKETS)
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+SYSTEM_INSTRUCTIONS = """You are a helpful todo assistant. You help users manage their todos through natural conversation.
+
+The user's current todos follow these instructions.
+
+When responding:
+1. Be conversational and helpful
+2. If the user wants to add, update, or complete todos, include the appropriate JSON structure
+3. Always respond with plain text followed by JSON if todo updates are needed
+4. For todo updates, use this exact format:
+
+RESPONSE_TEXT
+
+TODO_UPDATES:
+{
+    "updates": [
+        {
+            "action": "add|update|complete|delete",
+            "todoId": "uuid-string-if-updating-existing",
+            "title": "todo title",
+            "description": "optional description",
+            "priority": "low|medium|high|urgent",
+            "dueDate": "ISO8601 date string if applicable"
+        }
+    ]
+}
+
+Keep responses natural and conversational. Help prioritize and organize tasks thoughtfully."""
+
+SUMMARY_INSTRUCTIONS = """You maintain a running summary of a conversation between a user and their todo assistant.
+
+Merge the new messages into the existing summary. Keep what later turns may refer back to: facts about the user, preferences, decisions, plans and open questions. Leave out the todo list itself, which the assistant receives separately, and any TODO_UPDATES blocks.
+
+Reply with the updated summary only, as short plain-text notes."""
 
 class AIService:
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None, max_connections: int = 20,
+                 max_keepalive_connections: int = 10, keepalive_expiry: float = 60.0,
+                 http2: Optional[bool] = None, timeout: Optional[httpx.Timeout] = None):
         self.api_key = os.getenv('CLAUDE_API_KEY', '')
         if not self.api_key:
             print("Warning: CLAUDE_API_KEY environment variable not set")
         
-        self.base_url = "https://api.anthropic.com/v1/messages"
+        self.base_url = base_url or os.getenv('CLAUDE_API_URL', "https://api.anthropic.com/v1/messages")
+        self.model = "claude-3-5-sonnet-20241022"
         self.date_parser = DateParser()
+        self.prompt_builder = TodoPromptBuilder(token_budget=int(os.getenv('PROMPT_TODO_TOKEN_BUDGET', '2000')))
+        # Conversation history sent with each request: recent turns plus a summary of older ones
+        self.conversation_token_budget = int(os.getenv('CONVERSATION_TOKEN_BUDGET', '1500'))
+        self.conversation_window_messages = int(os.getenv('CONVERSATION_WINDOW_MESSAGES', '12'))
+        self._summary_tasks = set()
+        # What the most recent prompt included and left out, and the todo
+        # fingerprint it was built from
+        self.last_prompt_state: Optional[TodoPromptState] = None
+        self._state_fingerprint: Optional[str] = None
+        self.prompt_cache_hits = 0
+        self.prompt_cache_misses = 0
+        self.cache_read_input_tokens = 0
+        self.cache_creation_input_tokens = 0
+        
+        # One long-lived connection pool per client type so turns reuse warm
+        # TCP/TLS connections instead of handshaking every time
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = timeout or httpx.Timeout(60.0, connect=5.0, pool=5.0)
+        # HTTP/2 needs the optional h2 package (pip install httpx[http2])
+        self.http2 = _http2_available() if http2 is None else http2
+        self.headers = {
+            "Content-Type": "application/json",
+            "anthropic-version": "2023-06-01",
+            "x-api-key": self.api_key
+        }
+        
+        # The async client is bound to the event loop that first uses it
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+    
+    def create_conversation_memory(self) -> ConversationMemory:
+        """Empty conversation memory sized by the CONVERSATION_* settings"""
+        return ConversationMemory(
+            token_budget=self.conversation_token_budget,
+            window_messages=self.conversation_window_messages
+        )
+    
+    async def process_message(self, message: str, current_todos: List[Todo],
+                              memory: Optional[ConversationMemory] = None,
+                              message_id: Optional[str] = None) -> AIResponse:
+        """Answer a message; `memory` adds earlier turns, except the stored copy of this one (`message_id`)"""
+        if not self.api_key:
+            raise Exception("Claude API key not configured")
+        
+        enhanced_message = self._enhance_message_with_date_parsing(message)
+        context = self._conversation_context(memory, message_id)
+        system_prompt = self._create_system_prompt(current_todos, context)
+        
+        response = await self._make_api_request(self._get_async_client(), system_prompt, enhanced_message, context)
+        return self._parse_response(response)
     
-    async def process_message(self, message: str, current_todos: List[Todo]) -> AIResponse:
+    async def stream_message(self, message: str, current_todos: List[Todo],
+                             on_delta: Callable[[str], None],
+                             memory: Optional[ConversationMemory] = None,
+                             message_id: Optional[str] = None) -> AIResponse:
+        """Stream the reply, passing visible text to on_delta as it arrives"""
         if not self.api_key:
             raise Exception("Claude API key not configured")
         
         enhanced_message = self._enhance_message_with_date_parsing(message)
-        system_prompt = self._create_system_prompt(current_todos)
+        context = self._conversation_context(memory, message_id)
+        system_prompt = self._create_system_prompt(current_todos, context)
+        
+        body = self._build_request_body(system_prompt, enhanced_message, context)
+        body["stream"] = True
+        content = self._encode_request_body(body)
+        
+        parser = ResponseStreamParser()
+        started = time.perf_counter()
+        first_token = True
+        with CLAUDE_REQUEST_SECONDS.time(mode='stream'):
+            try:
+                async with self._get_async_client().stream("POST", self.base_url, content=content) as response:
+                    self._check_status(response)
+                    
+                    async for event in iter_sse_events(response.aiter_lines()):
+                        event_type = event.get("type")
+                        if event_type == "message_start":
+                            self._record_usage(event.get("message", {}).get("usage"), include_output=False)
+                        elif event_type == "content_block_delta" and event.get("delta", {}).get("type") == "text_delta":
+                            if first_token:
+                                CLAUDE_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+                                first_token = False
+                            visible = parser.feed(event["delta"].get("text", ""))
+                            if visible:
+                                on_delta(visible)
+                        elif event_type == "message_delta":
+                            # Carries the final output token count
+                            self._record_usage(event.get("usage"))
+                        elif event_type == "error":
+                            error = event.get("error", {})
+                            CLAUDE_ERRORS.inc(reason='stream')
+                            raise Exception(f"API stream error: {error.get('type', 'unknown')}")
+                        elif event_type == "message_stop":
+                            break
+                    CLAUDE_RESPONSE_BYTES.observe(response.num_bytes_downloaded)
+            except httpx.HTTPError:
+                CLAUDE_ERRORS.inc(reason='transport')
+                raise
         
-        async with httpx.AsyncClient() as client:
-            response = await self._make_api_request(client, system_prompt, enhanced_message)
-            return self._parse_response(response)
+        remaining = parser.finish()
+        if remaining:
+            on_delta(remaining)
+        
+        with CLAUDE_PARSE_SECONDS.time():
+            response_text, todo_updates = self._extract_todo_updates(parser.text)
+        return AIResponse(
+            message=response_text.strip(),
+            todo_updates=todo_updates
+        )
+    
+    async def aclose(self) -> None:
+        """Cancel background summaries and close the pooled HTTP clients"""
+        for task in list(self._summary_tasks):
+            task.cancel()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+    
+    def close(self) -> None:
+        """Close the pooled synchronous HTTP client"""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers, limits=self.limits, timeout=self.timeout, http2=self.http2
+            )
+        return self._async_client
+    
+    def _get_sync_client(self) -> httpx.Client:
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(
+                headers=self.headers, limits=self.limits, timeout=self.timeout, http2=self.http2
+            )
+        return self._sync_client
     
-    def process_message(self, message: str, current_todos: List[Todo]) -> AIResponse:
-        """Synchronous version for compatibility"""
+    def process_message_sync(self, message: str, current_todos: List[Todo],
+                             memory: Optional[ConversationMemory] = None,
+                             message_id: Optional[str] = None) -> AIResponse:
+        """Synchronous version for scripts and other non-async callers.
+        
+        Uses the memory's current summary but never refreshes it; that needs the async paths.
+        """
         if not self.api_key:
             raise Exception("Claude API key not configured")
         
         enhanced_message = self._enhance_message_with_date_parsing(message)
-        system_prompt = self._create_system_prompt(current_todos)
+        context = memory.context(exclude_id=message_id) if memory is not None else None
+        system_prompt = self._create_system_prompt(current_todos, context)
         
-        with httpx.Client() as client:
-            response = self._make_api_request_sync(client, system_prompt, enhanced_message)
-            return self._parse_response(response)
+        response = self._make_api_request_sync(self._get_sync_client(), system_prompt, enhanced_message, context)
+        return self._parse_response(response)
     
     def _enhance_message_with_date_parsing(self, message: str) -> str:
-        date_phrases = self.date_parser.extract_date_phrases(message)
+        date_spans = [span for span in self.date_parser.extract_date_spans(message) if span.value]
         
-        if not date_phrases:
+        if not date_spans:
             return message
         
-        enhanced_message = message
         date_context = "\n\nDetected date references:"
+        for span in date_spans:
+            date_context += f"\n- '{span.text}' = {span.value.isoformat()}"
         
-        for phrase in date_phrases:
-            parsed_date = self.date_parser.parse_natural_language_date(phrase)
-            if parsed_date:
-                iso_date = parsed_date.isoformat()
-                date_context += f"\n- '{phrase}' = {iso_date}"
-        
-        return enhanced_message + date_context
+        return message + date_context
     
-    def _create_system_prompt(self, todos: List[Todo]) -> str:
-        todos_json = self._todos_to_json(todos)
-        
-        return f"""You are a helpful todo assistant. You help users manage their todos through natural conversation.
-
-Current todos (JSON format):
-{todos_json}
+    def _create_system_prompt(self, todos: List[Todo], context: Optional[ConversationContext] = None) -> List[Dict[str, Any]]:
+        """System prompt as content blocks: fixed instructions first, then the todo state.
 
-When responding:
-1. Be conversational and helpful
-2. If the user wants to add, update, or complete todos, include the appropriate JSON structure
-3. Always respond with plain text followed by JSON if todo updates are needed
-4. For todo updates, use this exact format:
-
-RESPONSE_TEXT
-
-TODO_UPDATES:
-{{
-    "updates": [
-        {{
-            "action": "add|update|complete|delete",
-            "todoId": "uuid-string-if-updating-existing",
-            "title": "todo title",
-            "description": "optional description",
-            "priority": "low|medium|high|urgent",
-            "dueDate": "ISO8601 date string if applicable"
-        }}
-    ]
-}}
-
-Keep responses natural and conversational. Help prioritize and organize tasks thoughtfully."""
+        Both blocks carry a cache breakpoint. The instructions never change, and
+        the state block is byte-identical while the todo list is unchanged, so
+        consecutive turns can be served from the API's prompt cache. The
+        conversation summary changes more often, so it goes last.
+        """
+        blocks = [
+            {"type": "text", "text": SYSTEM_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": f"Current todos:\n{self._todos_to_json(todos)}", "cache_control": {"type": "ephemeral"}}
+        ]
+        if context is not None and context.summary:
+            blocks.append({"type": "text", "text": f"Summary of the earlier conversation:\n{context.summary}"})
+        return blocks
+    
+    def _conversation_context(self, memory: Optional[ConversationMemory],
+                              message_id: Optional[str]) -> Optional[ConversationContext]:
+        """Snapshot the memory for this request and fold older turns into its summary in the background"""
+        if memory is None:
+            return None
+        context = memory.context(exclude_id=message_id)
+        batch = memory.begin_summary()
+        if batch is not None:
+            task = asyncio.get_running_loop().create_task(self._refresh_summary(memory, *batch))
+            self._summary_tasks.add(task)
+            task.add_done_callback(self._summary_tasks.discard)
+        return context
+    
+    async def _refresh_summary(self, memory: ConversationMemory, summary: str,
+                               turns: List[Tuple[str, str]]) -> None:
+        """Ask the model to merge queued turns into the running summary"""
+        transcript = "\n".join(f"{role.capitalize()}: {text}" for role, text in turns)
+        body = {
+            "model": self.model,
+            "max_tokens": memory.summary_token_budget,
+            "system": SUMMARY_INSTRUCTIONS,
+            "messages": [{
+                "role": "user",
+                "content": f"Existing summary:\n{summary or '(none yet)'}\n\nNew messages:\n{transcript}"
+            }]
+        }
+        try:
+            content = self._encode_request_body(body)
+            with CLAUDE_REQUEST_SECONDS.time(mode='summary'):
+                try:
+                    response = await self._get_async_client().post(self.base_url, content=content)
+                except httpx.HTTPError:
+                    CLAUDE_ERRORS.inc(reason='transport')
+                    raise
+            self._check_status(response)
+            CLAUDE_RESPONSE_BYTES.observe(len(response.content))
+            data = response.json()
+            self._record_usage(data.get("usage"))
+            text = data["content"][0]["text"]
+            # Replies to the main prompt may carry todo updates; a summary has no use for them
+            text = text.split("TODO_UPDATES:")[0]
+            memory.finish_summary(text)
+        except asyncio.CancelledError:
+            memory.abort_summary()
+            raise
+        except Exception as e:
+            CLAUDE_ERRORS.inc(reason='summary')
+            print(f"Error summarizing conversation: {e}")
+            memory.abort_summary()
     
     def _todos_to_json(self, todos: List[Todo]) -> str:
         try:
-            todos_data = [todo.to_dict() for todo in todos]
-            return json.dumps(todos_data, indent=2)
+            fingerprint = self._todo_fingerprint(todos)
+            if self.last_prompt_state is not None and fingerprint == self._state_fingerprint:
+                self.prompt_cache_hits += 1
+                return self.last_prompt_state.text
+            
+            self.prompt_cache_misses += 1
+            self.last_prompt_state = self.prompt_builder.build(todos)
+            self._state_fingerprint = fingerprint
+            if self.last_prompt_state.truncated:
+                print(f"Prompt todo list truncated: {self.last_prompt_state.omitted_open} open and "
+                      f"{self.last_prompt_state.omitted_completed} completed todos omitted")
+            return self.last_prompt_state.text
         except Exception:
-            return "[]"
+            return "No todos available."
     
-    async def _make_api_request(self, client: httpx.AsyncClient, system_prompt: str, user_message: str) -> Dict[str, Any]:
-        headers = {
-            "Content-Type": "application/json",
-            "anthropic-version": "2023-06-01",
-            "x-api-key": self.api_key
+    @staticmethod
+    def _todo_fingerprint(todos: List[Todo]) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for todo in todos:
+            # The cached serialized form, rebuilt only for todos changed since they were last encoded
+            digest.update(todo.to_json().encode('utf-8'))
+        return digest.hexdigest()
+    
+    def prompt_cache_stats(self) -> Dict[str, int]:
+        """Local todo-state reuse counters plus the API's reported prompt cache usage"""
+        return {
+            'state_hits': self.prompt_cache_hits,
+            'state_misses': self.prompt_cache_misses,
+            'cache_read_input_tokens': self.cache_read_input_tokens,
+            'cache_creation_input_tokens': self.cache_creation_input_tokens
         }
+    
+    def _record_usage(self, usage: Optional[Dict[str, Any]], include_output: bool = True) -> None:
+        if not usage:
+            return
+        self.cache_read_input_tokens += usage.get('cache_read_input_tokens') or 0
+        self.cache_creation_input_tokens += usage.get('cache_creation_input_tokens') or 0
         
-        body = {
-            "model": "claude-3-5-sonnet-20241022",
+        for key, token_type in (('input_tokens', 'input'), ('output_tokens', 'output'),
+                                ('cache_read_input_tokens', 'cache_read'),
+                                ('cache_creation_input_tokens', 'cache_creation')):
+            if usage.get(key) and (include_output or token_type != 'output'):
+                CLAUDE_TOKENS.inc(usage[key], type=token_type)
+    
+    def _build_request_body(self, system_prompt: List[Dict[str, Any]], user_message: str,
+                            context: Optional[ConversationContext] = None) -> Dict[str, Any]:
+        messages = [dict(message) for message in context.messages] if context is not None else []
+        if messages and messages[-1]["role"] == "user":
+            # An earlier message is still waiting for its reply; send both as one user turn
+            messages[-1]["content"] += "\n\n" + user_message
+        else:
+            messages.append({
+                "role": "user",
+                "content": user_message
+            })
+        return {
+            "model": self.model,
             "max_tokens": 1000,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": user_message
-                }
-            ],
+            "messages": messages,
             "system": system_prompt
         }
+    
+    async def _make_api_request(self, client: httpx.AsyncClient, system_prompt: List[Dict[str, Any]], user_message: str,
+                                context: Optional[ConversationContext] = None) -> Dict[str, Any]:
+        content = self._encode_request_body(self._build_request_body(system_prompt, user_message, context))
+        with CLAUDE_REQUEST_SECONDS.time(mode='blocking'):
+            try:
+                response = await client.post(self.base_url, content=content)
+            except httpx.HTTPError:
+                CLAUDE_ERRORS.inc(reason='transport')
+                raise
         
-        response = await client.post(self.base_url, headers=headers, json=body)
-        
-        if response.status_code != 200:
-            raise Exception(f"API error with status code: {response.status_code}")
-        
+        self._check_status(response)
+        CLAUDE_RESPONSE_BYTES.observe(len(response.content))
         return response.json()
     
-    def _make_api_request_sync(self, client: httpx.Client, system_prompt: str, user_message: str) -> Dict[str, Any]:
-        headers = {
-            "Content-Type": "application/json",
-            "anthropic-version": "2023-06-01",
-            "x-api-key": self.api_key
-        }
-        
-        body = {
-            "model": "claude-3-5-sonnet-20241022",
-            "max_tokens": 1000,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": user_message
-                }
-            ],
-            "system": system_prompt
-        }
-        
-        response = client.post(self.base_url, headers=headers, json=body)
+    def _make_api_request_sync(self, client: httpx.Client, system_prompt: List[Dict[str, Any]], user_message: str,
+                               context: Optional[ConversationContext] = None) -> Dict[str, Any]:
+        content = self._encode_request_body(self._build_request_body(system_prompt, user_message, context))
+        with CLAUDE_REQUEST_SECONDS.time(mode='sync'):
+            try:
+                response = client.post(self.base_url, content=content)
+            except httpx.HTTPError:
+                CLAUDE_ERRORS.inc(reason='transport')
+                raise
         
+        self._check_status(response)
+        CLAUDE_RESPONSE_BYTES.observe(len(response.content))
+        return response.json()
+    
+    @staticmethod
+    def _encode_request_body(body: Dict[str, Any]) -> bytes:
+        # Encoded here rather than by httpx so the size can be recorded
+        content = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        CLAUDE_REQUEST_BYTES.observe(len(content))
+        return content
+    
+    @staticmethod
+    def _check_status(response: httpx.Response) -> None:
+        CLAUDE_RESPONSES.inc(status=response.status_code)
         if response.status_code != 200:
+            CLAUDE_ERRORS.inc(reason='status')
             raise Exception(f"API error with status code: {response.status_code}")
-        
-        return response.json()
     
     def _parse_response(self, json_response: Dict[str, Any]) -> AIResponse:
+        with CLAUDE_PARSE_SECONDS.time():
+            return self._parse_response_body(json_response)
+    
+    def _parse_response_body(self, json_response: Dict[str, Any]) -> AIResponse:
         try:
+            self._record_usage(json_response.get("usage"))
             content = json_response.get("content", [])
             if not content or not isinstance(content, list):
                 raise Exception("Invalid response format")
@@ -160,6 +447,7 @@ Keep responses natural and conversational. Help prioritize and organize tasks th
                 todo_updates=todo_updates
             )
         except Exception as e:
+            CLAUDE_ERRORS.inc(reason='parse')
             raise Exception(f"Failed to parse API response: {str(e)}")
     
     def _extract_todo_updates(self, text: str) -> Tuple[str, Optional[List[TodoUpdate]]]:
@@ -215,38 +503,10 @@ Keep responses natural and conversational. Help prioritize and organize tasks th
     
     def apply_todo_updates(self, todos: List[Todo], updates: List[TodoUpdate]) -> List[Todo]:
         """Apply todo updates to the current todo list"""
-        todos_copy = todos.copy()
-        
-        for update in updates:
-            if update.action == "add":
-                new_todo = Todo(
-                    title=update.title or "New Todo",
-                    description=update.description,
-                    priority=update.priority or TodoPriority.MEDIUM,
-                    due_date=update.due_date
-                )
-                todos_copy.append(new_todo)
-            
-            elif update.action == "complete":
-                for todo in todos_copy:
-                    if todo.id == update.todo_id:
-                        todo.mark_completed()
-                        break
-            
-            elif update.action == "update":
-                for todo in todos_copy:
-                    if todo.id == update.todo_id:
-                        if update.title:
-                            todo.title = update.title
-                        if update.description:
-                            todo.description = update.description
-                        if update.priority:
-                            todo.priority = update.priority
-                        if update.due_date:
-                            todo.due_date = update.due_date
-                        break
-            
-            elif update.action == "delete":
-                todos_copy = [todo for todo in todos_copy if todo.id != update.todo_id]
-        
-        return todos_copy
\ No newline at end of file
+        return self.apply_todo_batch(todos, updates)[0]
+    
+    def apply_todo_batch(self, todos: List[Todo], updates: List[TodoUpdate]) -> Tuple[List[Todo], List[UpdateResult]]:
+        """Apply todo updates and report the outcome of each one"""
+        store = TodoStore(todos)
+        results = store.apply(updates)
+        return store.todos(), results
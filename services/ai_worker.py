@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+class AIWorker:
+    """Runs AI calls on a dedicated asyncio event loop.
+
+    Socket.IO handlers submit a coroutine and return immediately; at most
+    `max_concurrency` calls are in flight at once and up to `max_pending`
+    more wait in line. Completion callbacks run on a thread pool so slow
+    persistence or emits never hold up the event loop.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_pending: int = 64):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+
+        self._loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+        self._thread = threading.Thread(target=self._run_loop, name="ai-worker", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    @property
+    def running(self) -> bool:
+        """Whether the event loop still accepts coroutines"""
+        return self._loop.is_running()
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted calls that have not finished yet"""
+        return self._pending
+
+    def submit(self, coro_factory: Callable[[], Awaitable[T]],
+               callback: Callable[[Optional[T], Optional[BaseException]], None]) -> bool:
+        """Queue a call; returns False without queueing when the backlog is full"""
+        with self._lock:
+            if self._pending >= self.max_concurrency + self.max_pending:
+                return False
+            self._pending += 1
+
+        asyncio.run_coroutine_threadsafe(self._run(coro_factory, callback), self._loop)
+        return True
+
+    def run_coroutine(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the worker loop and wait for its result (for shutdown hooks and scripts)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def close(self) -> None:
+        """Stop the event loop after the calls already running finish"""
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    async def _run(self, coro_factory, callback) -> None:
+        result, error = None, None
+        try:
+            async with self._semaphore:
+                result = await coro_factory()
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        try:
+            await self._loop.run_in_executor(None, callback, result, error)
+        except Exception as e:
+            print(f"Error in AI completion callback: {e}")
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._ready.set()
+        self._loop.run_forever()
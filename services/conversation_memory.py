@@ -0,0 +1,138 @@
+import itertools
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from models import Message
+
+# Chat roles the Messages API accepts, by MessageSender value
+_ROLES = {'user': 'user', 'assistant': 'assistant'}
+
+@dataclass
+class ConversationContext:
+    summary: Optional[str]
+    messages: List[Dict[str, str]]  # alternating user/assistant turns, oldest first, starting with user
+    estimated_tokens: int
+
+class ConversationMemory:
+    """Recent chat turns kept verbatim plus a running summary of older ones.
+
+    Messages enter a sliding window; once the window holds more than
+    `window_messages` or its token estimate exceeds what the budget leaves
+    after the summary, the oldest messages move to a queue of turns waiting
+    to be folded into the summary. AIService folds them in the background, so
+    a request never waits on summarization; until then those turns are simply
+    left out. The summary plus the window never exceed `token_budget`.
+    """
+
+    def __init__(self, token_budget: int = 1500, window_messages: int = 12,
+                 summary_token_budget: int = 300, summarize_batch: int = 4,
+                 max_unsummarized: int = 100, chars_per_token: float = 4.0):
+        self.token_budget = token_budget
+        self.window_messages = window_messages
+        self.summary_token_budget = min(summary_token_budget, token_budget // 2)
+        self.summarize_batch = summarize_batch
+        self.max_unsummarized = max_unsummarized
+        self.chars_per_token = chars_per_token
+
+        self.summary = ""
+        # (message id, role, text, estimated tokens), oldest first
+        self._window: Deque[Tuple[str, str, str, int]] = deque()
+        self._window_tokens = 0
+        # (sequence number, role, text) turns that left the window but are not in the summary yet
+        self._unsummarized: List[Tuple[int, str, str]] = []
+        self._sequence = itertools.count()
+        # Sequence number of the newest turn claimed by the summary in flight, if any
+        self._claimed: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def window_token_budget(self) -> int:
+        return self.token_budget - self.summary_token_budget
+
+    def seed(self, messages: List[Message]) -> None:
+        """Fill the window from stored history, oldest first"""
+        for message in messages[-self.window_messages:]:
+            self.add(message.to_dict())
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Add a chat message in to_dict() form; system and error messages are ignored"""
+        role = _ROLES.get(record.get('sender'))
+        if role is None or record.get('message_type', 'text') != 'text':
+            return
+
+        text = self._clip(record.get('content') or '', self.window_token_budget)
+        tokens = self.estimate_tokens(text)
+        with self._lock:
+            self._window.append((record.get('id'), role, text, tokens))
+            self._window_tokens += tokens
+            while self._window and (len(self._window) > self.window_messages
+                                    or self._window_tokens > self.window_token_budget):
+                _, old_role, old_text, old_tokens = self._window.popleft()
+                self._window_tokens -= old_tokens
+                self._unsummarized.append((next(self._sequence), old_role, old_text))
+            if len(self._unsummarized) > self.max_unsummarized:
+                # Summaries keep failing; forget the oldest turns rather than grow without bound
+                del self._unsummarized[:len(self._unsummarized) - self.max_unsummarized]
+
+    def context(self, exclude_id: Optional[str] = None) -> ConversationContext:
+        """Summary and window to send with a request, leaving out the message being answered"""
+        with self._lock:
+            entries = [(role, text) for message_id, role, text, _ in self._window if message_id != exclude_id]
+            summary = self.summary or None
+
+        messages: List[Dict[str, str]] = []
+        for role, text in entries:
+            if not messages and role != 'user':
+                continue
+            if messages and messages[-1]['role'] == role:
+                # Concurrent turns can leave two user messages in a row; the API wants alternation
+                messages[-1]['content'] += "\n\n" + text
+            else:
+                messages.append({'role': role, 'content': text})
+
+        tokens = sum(self.estimate_tokens(message['content']) for message in messages)
+        if summary:
+            tokens += self.estimate_tokens(summary)
+        return ConversationContext(summary, messages, tokens)
+
+    def begin_summary(self) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+        """Claim the queued turns for summarization, or None if there is nothing to do yet"""
+        with self._lock:
+            if self._claimed is not None or len(self._unsummarized) < self.summarize_batch:
+                return None
+            self._claimed = self._unsummarized[-1][0]
+            return self.summary, [(role, text) for _, role, text in self._unsummarized]
+
+    def finish_summary(self, summary: str) -> None:
+        """Store a new summary that covers the claimed turns and drop them from the queue"""
+        with self._lock:
+            self.summary = self._clip(summary.strip(), self.summary_token_budget)
+            # The cap may have trimmed claimed turns meanwhile, so match by sequence rather than position
+            if self._claimed is not None:
+                self._unsummarized = [entry for entry in self._unsummarized if entry[0] > self._claimed]
+            self._claimed = None
+
+    def abort_summary(self) -> None:
+        """Release the claim after a failed summary; the turns stay queued for the next try"""
+        with self._lock:
+            self._claimed = None
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def _clip(self, text: str, token_budget: int) -> str:
+        limit = int(token_budget * self.chars_per_token)
+        if len(text) <= limit:
+            return text
+        return text[:max(limit - 1, 0)] + "…"
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'window_messages': len(self._window),
+                'window_tokens': self._window_tokens,
+                'unsummarized': len(self._unsummarized),
+                'summary_tokens': self.estimate_tokens(self.summary)
+            }
@@ -1,13 +1,91 @@
 import re
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Callable, Dict, Tuple
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6,
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3,
+    "fri": 4, "sat": 5, "sun": 6
+}
+
+# Every supported date expression as one alternation, so a message is scanned once.
+# Alternatives are ordered so the longest numeric form wins at a given position.
+DATE_PATTERN = re.compile(
+    r"\b(?:"
+    r"(?P<ymd>(?P<ymd_y>\d{4})[/-](?P<ymd_m>\d{1,2})[/-](?P<ymd_d>\d{1,2}))"
+    r"|(?P<mdy>(?P<mdy_m>\d{1,2})[/-](?P<mdy_d>\d{1,2})[/-](?P<mdy_y>\d{4}|\d{2}))"
+    r"|(?P<md>(?P<md_m>\d{1,2})[/-](?P<md_d>\d{1,2}))"
+    r"|(?P<day>today|tomorrow|yesterday)"
+    r"|(?P<period>(?P<period_rel>next|this)\s+(?P<period_unit>week|month|year))"
+    r"|(?P<weekday>" + "|".join(sorted(WEEKDAYS, key=len, reverse=True)) + r")"
+    r"|(?P<in_days>(?:in|after)\s+(?P<in_days_n>\d+)\s+days?)"
+    r"|(?P<days_from_now>(?P<days_from_now_n>\d+)\s+days?\s+from\s+now)"
+    r")\b",
+    re.IGNORECASE
+)
+
+DATE_KINDS = ("ymd", "mdy", "md", "day", "period", "weekday", "in_days", "days_from_now")
+
+@dataclass
+class DateSpan:
+    kind: str
+    start: int
+    end: int
+    text: str
+    value: Optional[datetime]
 
 class DateParser:
-    def __init__(self):
-        self.today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    def __init__(self, clock: Callable[[], datetime] = datetime.now, cache_size: int = 512):
+        # The clock is injectable so tests can move "now" across midnight
+        self.clock = clock
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Resolved dates keyed by (kind, normalized phrase); only valid for _cache_day
+        self._cache: "OrderedDict[Tuple[str, str], Optional[datetime]]" = OrderedDict()
+        self._cache_day: Optional[datetime] = None
+    
+    @property
+    def today(self) -> datetime:
+        """Midnight of the current day according to the clock"""
+        today = self.clock().replace(hour=0, minute=0, second=0, microsecond=0)
+        if today != self._cache_day:
+            # Relative phrases resolve differently after the day changes
+            self._cache.clear()
+            self._cache_day = today
+        return today
+    
+    def cache_info(self) -> Dict[str, int]:
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'size': len(self._cache)}
     
     def parse_natural_language_date(self, text: str) -> Optional[datetime]:
         """Parse natural language date expressions into datetime objects"""
+        self.today  # clears the cache on day rollover
+        return self._memoized("parse", text, lambda: self._parse_natural_language_date(text))
+    
+    def _memoized(self, kind: str, phrase: str, resolve: Callable[[], Optional[datetime]]) -> Optional[datetime]:
+        """Look up a resolved phrase for the current day, resolving and caching it on a miss.
+
+        Callers read self.today first so a day rollover has already cleared the cache.
+        """
+        key = (kind, " ".join(phrase.lower().split()))
+        
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key]
+        
+        self.cache_misses += 1
+        value = resolve()
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+    
+    def _parse_natural_language_date(self, text: str) -> Optional[datetime]:
         text_lower = text.lower().strip()
         
         # Today
@@ -156,4 +234,82 @@ class DateParser:
             for match in matches:
                 phrases.append(match.group())
         
-        return phrases
\ No newline at end of file
+        return phrases
+    
+    def extract_date_spans(self, text: str) -> List[DateSpan]:
+        """Find and resolve every date expression in one pass over the text"""
+        self.today  # clears the cache on day rollover
+        spans = []
+        for match in DATE_PATTERN.finditer(text):
+            kind = match.lastgroup if match.lastgroup in DATE_KINDS else next(
+                k for k in DATE_KINDS if match.group(k) is not None
+            )
+            phrase = match.group(0).lower()
+            spans.append(DateSpan(
+                kind=kind,
+                start=match.start(),
+                end=match.end(),
+                text=phrase,
+                value=self._memoized(kind, phrase, lambda: self._resolve_match(kind, match))
+            ))
+        return spans
+    
+    def _resolve_match(self, kind: str, match: re.Match) -> Optional[datetime]:
+        """Turn a DATE_PATTERN match into a date relative to today"""
+        today = self.today
+        try:
+            if kind == "day":
+                offset = {"today": 0, "tomorrow": 1, "yesterday": -1}[match.group("day").lower()]
+                return today + timedelta(days=offset)
+            
+            if kind == "weekday":
+                return self._next_date_for_weekday(WEEKDAYS[match.group("weekday").lower()])
+            
+            if kind == "period":
+                if match.group("period_rel").lower() == "this":
+                    return today
+                unit = match.group("period_unit").lower()
+                if unit == "week":
+                    return today + timedelta(weeks=1)
+                if unit == "month":
+                    if today.month == 12:
+                        return today.replace(year=today.year + 1, month=1)
+                    return _replace_clamped(today, month=today.month + 1)
+                return _replace_clamped(today, year=today.year + 1)
+            
+            if kind == "in_days":
+                return today + timedelta(days=int(match.group("in_days_n")))
+            
+            if kind == "days_from_now":
+                return today + timedelta(days=int(match.group("days_from_now_n")))
+            
+            if kind == "ymd":
+                return datetime(int(match.group("ymd_y")), int(match.group("ymd_m")), int(match.group("ymd_d")))
+            
+            if kind == "mdy":
+                year = int(match.group("mdy_y"))
+                if year < 100:
+                    year += 2000
+                return datetime(year, int(match.group("mdy_m")), int(match.group("mdy_d")))
+            
+            if kind == "md":
+                parsed_date = datetime(today.year, int(match.group("md_m")), int(match.group("md_d")))
+                # If the date is in the past, assume next year
+                if parsed_date < today:
+                    parsed_date = _replace_clamped(parsed_date, year=today.year + 1)
+                return parsed_date
+        except (ValueError, OverflowError):
+            return None
+        
+        return None
+
+def _replace_clamped(value: datetime, **fields) -> datetime:
+    """datetime.replace that falls back to the last valid day of the month (e.g. Jan 31 -> Feb 28)"""
+    day = value.day
+    while True:
+        try:
+            return value.replace(day=day, **fields)
+        except ValueError:
+            if day <= 28:
+                raise
+            day -= 1
@@ -0,0 +1,58 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; locking is then per process only
+    fcntl = None
+
+class InterProcessLock:
+    """Exclusive lock shared by threads in this process and by other processes.
+
+    Threads queue on an in-process lock first; the holder then takes an
+    flock on the lock file, which serializes it against other workers using
+    the same data directory. Reentrant within a thread; the file lock is
+    taken by the outermost acquire and dropped by the matching release.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth > 1 or fcntl is None:
+            return
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except Exception:
+            self._depth -= 1
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        self._depth -= 1
+        try:
+            if self._depth == 0 and fcntl is not None and self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    def close(self) -> None:
+        """Close the lock file; a later acquire reopens it"""
+        with self._thread_lock:
+            if self._depth == 0 and self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self) -> 'InterProcessLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
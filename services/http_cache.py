@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+class RevisionCounter:
+    """Thread-safe counter bumped on every change to a piece of data"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def bump(self) -> int:
+        with self._lock:
+            self.value += 1
+            return self.value
+
+class CachedBody:
+    """One serialized JSON response plus its compressed variants, built on demand"""
+
+    def __init__(self, revision: Hashable, etag: str, body: bytes, compressible: bool):
+        self.revision = revision
+        self.etag = etag
+        self.body = body
+        self.compressible = compressible
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def encodings(self) -> List[str]:
+        """Content encodings this body can be sent with, preferred first"""
+        if not self.compressible:
+            return ['identity']
+        return (['br'] if brotli is not None else []) + ['gzip', 'identity']
+
+    def etag_for(self, encoding: str) -> str:
+        # Each encoding is a different representation, so it gets its own strong tag
+        if encoding == 'identity':
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+    def all_etags(self) -> List[str]:
+        return [self.etag_for(encoding) for encoding in self.encodings]
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding == 'identity':
+            return self.body
+        with self._lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                if encoding == 'br':
+                    data = brotli.compress(self.body, quality=5)
+                else:
+                    data = gzip.compress(self.body, compresslevel=6)
+                self._encoded[encoding] = data
+            return data
+
+class ResponseCache:
+    """Serialized API responses keyed by request, valid until their data's revision changes.
+
+    A cached body is reused as long as the revision passed in matches the one
+    it was built at, so repeated polls cost a dict lookup and, for clients
+    that send If-None-Match, no body at all. ETags include a per-process
+    epoch so revisions restarting from zero never collide.
+    """
+
+    def __init__(self, max_entries: int = 256, min_compress_size: int = 1024):
+        self.max_entries = max_entries
+        self.min_compress_size = min_compress_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, revision: Hashable, build: Callable[[], Any]) -> CachedBody:
+        """Return the cached body for `key` at `revision`, serializing build() on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.revision == revision:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Serialize outside the lock; concurrent misses for one key just race to store
+        body = json.dumps(build(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.blake2b(f"{key}|{revision}".encode('utf-8'), digest_size=8).hexdigest()
+        entry = CachedBody(revision, f'"{self.epoch}-{digest}"', body, len(body) >= self.min_compress_size)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+def choose_encoding(accept_encodings: Any, body: CachedBody) -> str:
+    """Pick the best encoding the client accepts; accept_encodings is werkzeug's request.accept_encodings"""
+    return accept_encodings.best_match(body.encodings, default='identity') or 'identity'
+
+def etag_matches(if_none_match: Any, body: CachedBody) -> bool:
+    """True when If-None-Match names any representation of this body (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.star_tag:
+        return True
+    return any(if_none_match.contains_weak(etag.strip('"')) for etag in body.all_etags())
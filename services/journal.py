@@ -0,0 +1,281 @@
+import copy
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from models import Todo, Message, encode_messages
+from services.persistence import (
+    PersistenceManager, PERSISTENCE_SECONDS, PERSISTENCE_BYTES, PERSISTENCE_ERRORS,
+    page_messages, write_bytes_atomic
+)
+
+class JournalPersistenceManager(PersistenceManager):
+    """Snapshot + append-only journal storage.
+
+    The existing messages.json/todos.json files act as the snapshot. Every save
+    appends only what changed to journal.jsonl, and a background compactor
+    periodically folds the journal back into the snapshot.
+    """
+
+    def __init__(self, data_dir: str = "data", compact_threshold: int = 500, compact_interval: float = 30.0):
+        super().__init__(data_dir)
+        self.journal_file = os.path.join(data_dir, "journal.jsonl")
+        self.rotated_journal_file = self.journal_file + ".1"
+        self.compact_threshold = compact_threshold
+        self.compact_interval = compact_interval
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._messages: List[Message] = []
+        self._message_ids = set()
+        self._todos: Dict[str, Todo] = {}
+        # Last persisted JSON of each todo, used to detect in-place mutations
+        self._todo_records: Dict[str, str] = {}
+        self._journal_entries = 0
+
+        self._replay()
+        self._end_torn_line()
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._compactor = threading.Thread(target=self._compact_loop, name="journal-compactor", daemon=True)
+        self._compactor.start()
+
+    # Public interface
+
+    def load_messages(self) -> List[Message]:
+        """Return the message history from memory"""
+        with self._lock:
+            return list(self._messages)
+
+    def load_message_page(self, before_id: Optional[str] = None, limit: int = 50) -> Tuple[List[Message], bool]:
+        """Load a page of history from memory"""
+        with self._lock:
+            return page_messages(self._messages, before_id, limit)
+
+    def save_messages(self, messages: List[Message]) -> None:
+        """Journal the messages that are new since the last save"""
+        with self._lock:
+            known = len(self._messages)
+            # Checking the last known id is enough to recognise an extended history
+            if len(messages) >= known and (known == 0 or messages[known - 1].id == self._messages[-1].id):
+                for message in messages[known:]:
+                    self._add_message(message)
+            else:
+                # History was rewritten rather than extended
+                self._set_messages(messages)
+                self._write_entry({'op': 'messages_reset', 'data': [msg.to_dict() for msg in messages]})
+
+    def append_message(self, message: Message) -> None:
+        """Journal a single new message"""
+        with self._lock:
+            self._add_message(message)
+
+    def load_todos(self) -> List[Todo]:
+        """Return copies of the current todos from memory"""
+        with self._lock:
+            return [copy.copy(todo) for todo in self._todos.values()]
+
+    def save_todos(self, todos: List[Todo]) -> None:
+        """Journal upserts for changed todos and deletes for removed ones"""
+        with self._lock:
+            seen = set()
+            for todo in todos:
+                seen.add(todo.id)
+                self.upsert_todo(todo)
+
+            for todo_id in [todo_id for todo_id in self._todos if todo_id not in seen]:
+                self.delete_todo(todo_id)
+
+    def save_todo_changes(self, changed: List[Todo], deleted_ids: List[str]) -> None:
+        """Journal only the given changes"""
+        with self._lock:
+            for todo in changed:
+                self.upsert_todo(todo)
+            for todo_id in deleted_ids:
+                self.delete_todo(todo_id)
+
+    def upsert_todo(self, todo: Todo) -> None:
+        """Journal a single added or modified todo"""
+        with self._lock:
+            record = todo.to_json()
+            if self._todo_records.get(todo.id) == record:
+                return
+            self._todos[todo.id] = copy.copy(todo)
+            self._todo_records[todo.id] = record
+            self._write_record_entry('todo_upsert', record)
+
+    def delete_todo(self, todo_id: str) -> None:
+        """Journal the removal of a todo"""
+        with self._lock:
+            if todo_id not in self._todos:
+                return
+            del self._todos[todo_id]
+            del self._todo_records[todo_id]
+            self._write_entry({'op': 'todo_delete', 'id': todo_id})
+
+    def clear_all_data(self) -> None:
+        """Clear all persisted data, including the journal"""
+        with self._lock:
+            self._messages = []
+            self._message_ids = set()
+            self._todos = {}
+            self._todo_records = {}
+            self._journal.close()
+            super().clear_all_data()
+            for path in (self.journal_file, self.rotated_journal_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+            self._journal_entries = 0
+
+    def backup_data(self, backup_dir: str = "backup") -> bool:
+        """Fold the journal into the snapshot, then back the snapshot up"""
+        self.compact()
+        return super().backup_data(backup_dir)
+
+    def compact(self) -> None:
+        """Fold the journal into the snapshot files"""
+        with self._compact_lock:
+            with self._lock:
+                if self._journal_entries == 0 and not os.path.exists(self.rotated_journal_file):
+                    return
+
+                # Rotate the journal so writers can keep appending while the snapshot is written
+                self._journal.close()
+                if os.path.exists(self.rotated_journal_file):
+                    # A previous compaction did not finish; keep its entries
+                    with open(self.journal_file, 'r', encoding='utf-8') as src, \
+                            open(self.rotated_journal_file, 'a', encoding='utf-8') as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_file)
+                else:
+                    os.replace(self.journal_file, self.rotated_journal_file)
+                self._journal = open(self.journal_file, 'a', encoding='utf-8')
+                self._journal_entries = 0
+
+                messages = list(self._messages)
+                todo_records = list(self._todo_records.values())
+
+            try:
+                with PERSISTENCE_SECONDS.time(operation='compact', file='journal.jsonl'):
+                    write_bytes_atomic(self.messages_file, encode_messages(messages))
+                    write_bytes_atomic(self.todos_file, ('[' + ','.join(todo_records) + ']').encode('utf-8'))
+                    os.remove(self.rotated_journal_file)
+            except Exception as e:
+                # The rotated journal is replayed on the next start, so nothing is lost
+                PERSISTENCE_ERRORS.inc(operation='compact', file='journal.jsonl')
+                print(f"Error compacting journal: {e}")
+
+    def close(self) -> None:
+        """Stop the compactor and leave a fully compacted snapshot on disk"""
+        self._stop.set()
+        self._wake.set()
+        self._compactor.join(timeout=5)
+        self.compact()
+        with self._lock:
+            self._journal.close()
+        for lock in self._file_locks.values():
+            lock.close()
+
+    # Internal helpers
+
+    def _add_message(self, message: Message) -> None:
+        if message.id in self._message_ids:
+            return
+        self._messages.append(message)
+        self._message_ids.add(message.id)
+        self._write_record_entry('message', message.to_json())
+
+    def _set_messages(self, messages: List[Message]) -> None:
+        self._messages = list(messages)
+        self._message_ids = {msg.id for msg in messages}
+
+    def _write_entry(self, entry: Dict[str, Any]) -> None:
+        self._write_line(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _write_record_entry(self, op: str, record_json: str) -> None:
+        """Journal a record from its cached JSON instead of re-encoding it"""
+        self._write_line('{"op":"' + op + '","data":' + record_json + '}\n')
+
+    def _write_line(self, line: str) -> None:
+        try:
+            with PERSISTENCE_SECONDS.time(operation='append', file='journal.jsonl'):
+                self._journal.write(line)
+                self._journal.flush()
+        except Exception as e:
+            PERSISTENCE_ERRORS.inc(operation='append', file='journal.jsonl')
+            print(f"Error writing journal entry: {e}")
+            return
+        PERSISTENCE_BYTES.inc(len(line), operation='append', file='journal.jsonl')
+
+        self._journal_entries += 1
+        if self._journal_entries >= self.compact_threshold:
+            self._wake.set()
+
+    def _replay(self) -> None:
+        """Rebuild in-memory state from the snapshot plus any journal tail"""
+        self._set_messages(super().load_messages())
+        for todo in super().load_todos():
+            self._todos[todo.id] = todo
+            self._todo_records[todo.id] = todo.to_json()
+
+        for path in (self.rotated_journal_file, self.journal_file):
+            if os.path.exists(path):
+                self._replay_file(path)
+
+    def _replay_file(self, path: str) -> None:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._apply_entry(json.loads(line))
+                except (json.JSONDecodeError, KeyError, ValueError) as e:
+                    # A torn final line from a crash mid-write is expected; skip it
+                    print(f"Skipping journal entry {path}:{line_number}: {e}")
+                    continue
+                if path == self.journal_file:
+                    self._journal_entries += 1
+
+    def _end_torn_line(self) -> None:
+        """Terminate a torn final line so the next append doesn't get glued onto it"""
+        try:
+            with open(self.journal_file, 'rb+') as f:
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+        except FileNotFoundError:
+            pass
+
+    def _apply_entry(self, entry: Dict[str, Any]) -> None:
+        op = entry['op']
+
+        if op == 'message':
+            message = Message.from_dict(entry['data'])
+            if message.id not in self._message_ids:
+                self._messages.append(message)
+                self._message_ids.add(message.id)
+        elif op == 'messages_reset':
+            self._set_messages([Message.from_dict(msg_data) for msg_data in entry['data']])
+        elif op == 'todo_upsert':
+            todo = Todo.from_dict(entry['data'])
+            self._todos[todo.id] = todo
+            self._todo_records[todo.id] = todo.to_json()
+        elif op == 'todo_delete':
+            self._todos.pop(entry['id'], None)
+            self._todo_records.pop(entry['id'], None)
+
+    def _compact_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.compact_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Error in journal compactor: {e}")
@@ -0,0 +1,247 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# handler(event, data, local): local is True for events published by this worker
+BusHandler = Callable[[str, Any, bool], None]
+
+# Delivered instead of events a worker missed, with data {'scope': ..., 'missed': [event names]}:
+# reload the state for that scope from storage
+RESYNC_EVENT = 'bus_resync'
+
+class MessageBus:
+    """Publish/subscribe channel for events that every worker must see.
+
+    The base class delivers within the current process only, which is all a
+    single-worker deployment needs. Subclasses also forward events to other
+    workers; each worker then delivers them to its own subscribers.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: List[BusHandler] = []
+
+    def subscribe(self, handler: BusHandler) -> None:
+        self._handlers.append(handler)
+
+    def publish(self, event: str, data: Any, resync_scope: Optional[str] = None) -> None:
+        """Deliver an event to every worker.
+
+        `resync_scope` names the state the event changes; a worker that cannot
+        receive the event gets a RESYNC_EVENT for that scope instead. Events
+        without one (such as streaming text) are best effort.
+        """
+        self._deliver(event, data, True)
+
+    def close(self) -> None:
+        pass
+
+    def _deliver(self, event: str, data: Any, local: bool) -> None:
+        for handler in self._handlers:
+            try:
+                handler(event, data, local)
+            except Exception as e:
+                print(f"Error handling bus event {event}: {e}")
+
+class LocalSocketMessageBus(MessageBus):
+    """Fans events out to workers on the same host over Unix datagram sockets.
+
+    Every worker binds `<directory>/<worker id>.sock` and publishes by sending
+    one datagram to each other socket in the directory. The peer list is
+    re-read only when the directory changes, and sockets left behind by dead
+    workers are removed the first time a send to them is refused.
+
+    Sends never block the publisher. When a peer's receive queue is full,
+    events wait in a per-peer backlog that a sender thread drains in order.
+    If an event is too large for one datagram, or a peer falls so far behind
+    that its backlog overflows, the peer is sent a RESYNC_EVENT for the
+    affected scope instead, telling it to reload that state from storage.
+    """
+
+    # Upper bound on one encoded event; the kernel may cap the socket buffers lower
+    MAX_DATAGRAM = 4 * 1024 * 1024
+    # Datagrams held per peer while its queue is full
+    MAX_BACKLOG = 256
+    # How often the sender thread retries peers with a backlog
+    RETRY_INTERVAL = 0.005
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{self.worker_id}.sock")
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.MAX_DATAGRAM)
+        self._socket.bind(self.path)
+
+        # Separate unbound socket for sending, so sends can be non-blocking while the reader blocks
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.MAX_DATAGRAM)
+        self._sender.setblocking(False)
+        # Linux reports double the usable buffer, and net.core.wmem_max may have capped it
+        self.max_payload = min(self.MAX_DATAGRAM, self._sender.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) // 2)
+
+        self._peers: Tuple[Optional[int], List[str]] = (None, [])
+        # peer path -> queued (payload, resync scope, event), oldest first
+        self._backlogs: Dict[str, Deque[Tuple[bytes, Optional[str], str]]] = {}
+        self._send_lock = threading.Lock()
+        self._backlogged = threading.Event()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="message-bus", daemon=True)
+        self._reader.start()
+        self._retrier = threading.Thread(target=self._retry_loop, name="message-bus-sender", daemon=True)
+        self._retrier.start()
+
+    def publish(self, event: str, data: Any, resync_scope: Optional[str] = None) -> None:
+        self._deliver(event, data, True)
+
+        payload = self._encode(event, data)
+        if len(payload) > self.max_payload:
+            if resync_scope is None:
+                print(f"Dropping bus event {event}: {len(payload)} bytes is over the {self.max_payload} byte limit")
+                return
+            print(f"Bus event {event} is {len(payload)} bytes, over the {self.max_payload} byte limit; "
+                  f"asking peers to resync instead")
+            payload = self._resync_payload(resync_scope, [event])
+            event = RESYNC_EVENT
+
+        with self._send_lock:
+            for peer in self._peer_paths():
+                backlog = self._backlogs.get(peer)
+                if backlog:
+                    # Keep order: this peer sees nothing new until its backlog drains
+                    self._enqueue(peer, backlog, payload, resync_scope, event)
+                elif self._send(peer, payload) is False:
+                    self._enqueue(peer, self._backlogs.setdefault(peer, deque()), payload, resync_scope, event)
+
+    def close(self) -> None:
+        self._closed = True
+        self._backlogged.set()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        try:
+            # Wakes the reader thread out of recv()
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._retrier.join(timeout=1)
+        self._sender.close()
+
+    def _encode(self, event: str, data: Any) -> bytes:
+        return json.dumps({'event': event, 'data': data, 'origin': self.worker_id}, ensure_ascii=False).encode('utf-8')
+
+    def _resync_payload(self, scope: Optional[str], missed: List[str]) -> bytes:
+        return self._encode(RESYNC_EVENT, {'scope': scope, 'missed': sorted(set(missed))})
+
+    def _send(self, peer: str, payload: bytes) -> Optional[bool]:
+        """True if sent, False if the peer's queue is full, None if the peer is gone"""
+        try:
+            self._sender.sendto(payload, peer)
+            return True
+        except BlockingIOError:
+            return False
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Nobody is bound there any more
+            self._remove_peer(peer)
+            return None
+        except OSError as e:
+            print(f"Error publishing to {os.path.basename(peer)}: {e}")
+            return None
+
+    def _enqueue(self, peer: str, backlog: Deque[Tuple[bytes, Optional[str], str]],
+                 payload: bytes, resync_scope: Optional[str], event: str) -> None:
+        """Queue a datagram for a busy peer; call with _send_lock held"""
+        backlog.append((payload, resync_scope, event))
+        if len(backlog) > self.MAX_BACKLOG:
+            # The peer is too far behind to replay; have it reload what the dropped events touched
+            missed: Dict[str, List[str]] = {}
+            for dropped_payload, scope, dropped_event in backlog:
+                if scope is None:
+                    continue
+                if dropped_event == RESYNC_EVENT:
+                    # Carry over what an already queued resync covered
+                    missed.setdefault(scope, []).extend(json.loads(dropped_payload)['data']['missed'])
+                else:
+                    missed.setdefault(scope, []).append(dropped_event)
+            backlog.clear()
+            for scope, events in missed.items():
+                backlog.append((self._resync_payload(scope, events), scope, RESYNC_EVENT))
+            print(f"Bus peer {os.path.basename(peer)} fell behind; asked it to resync {len(missed)} scope(s)")
+        self._backlogged.set()
+
+    def _retry_loop(self) -> None:
+        while not self._closed:
+            self._backlogged.wait()
+            if self._closed:
+                return
+            with self._send_lock:
+                for peer, backlog in list(self._backlogs.items()):
+                    while backlog:
+                        sent = self._send(peer, backlog[0][0])
+                        if sent is False:
+                            break
+                        if sent is None:
+                            backlog.clear()
+                            break
+                        backlog.popleft()
+                    if not backlog:
+                        del self._backlogs[peer]
+                if not self._backlogs:
+                    self._backlogged.clear()
+            time.sleep(self.RETRY_INTERVAL)
+
+    def _peer_paths(self) -> List[str]:
+        try:
+            version = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if version != self._peers[0]:
+            peers = [
+                os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.endswith('.sock') and name != os.path.basename(self.path)
+            ]
+            self._peers = (version, peers)
+        return self._peers[1]
+
+    def _remove_peer(self, peer: str) -> None:
+        try:
+            os.remove(peer)
+        except FileNotFoundError:
+            pass
+        self._peers = (None, [])
+
+    def _read_loop(self) -> None:
+        while not self._closed:
+            try:
+                payload = self._socket.recv(self.MAX_DATAGRAM)
+            except OSError:
+                if self._closed:
+                    return
+                continue
+            if self._closed:
+                return
+            try:
+                message = json.loads(payload)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                print(f"Error decoding bus event: {e}")
+                continue
+            if message.get('origin') != self.worker_id:
+                self._deliver(message['event'], message['data'], False)
+
+def create_message_bus() -> MessageBus:
+    """Create the bus selected by the MESSAGE_BUS environment variable"""
+    kind = os.getenv('MESSAGE_BUS', 'local').lower()
+    if kind == 'socket':
+        return LocalSocketMessageBus(os.getenv('MESSAGE_BUS_DIR', os.path.join('data', 'bus')))
+    if kind != 'local':
+        print(f"Unknown MESSAGE_BUS '{kind}', falling back to local")
+    return MessageBus()
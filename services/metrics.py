@@ -0,0 +1,188 @@
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Seconds; spans fast cache hits up to slow model replies
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelKey = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Counter:
+    """Monotonic count, optionally split by labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: 'Histogram', labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+class Histogram:
+    """Distribution of observed values over fixed buckets, optionally split by labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket counts (the last one is +Inf), sum
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def time(self, **labels: str) -> _Timer:
+        """Context manager that observes the elapsed wall time of its block"""
+        return _Timer(self, labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class CallbackMetric:
+    """Gauge or counter whose value is read from a function at scrape time"""
+
+    def __init__(self, name: str, documentation: str, func: Callable[[], Union[float, Dict[LabelKey, float]]],
+                 metric_type: str = "gauge", labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.metric_type = metric_type
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        try:
+            value = self.func()
+        except Exception as e:
+            print(f"Error reading metric {self.name}: {e}")
+            return []
+        values = value.items() if isinstance(value, dict) else [((), value)]
+        for key, item in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(item)}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format.
+
+    Recording a value is a dict update under a per-metric lock; all
+    formatting happens in render(), so the cost is only paid when scraped.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Histogram, CallbackMetric]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, func: Callable[[], Union[float, Dict[LabelKey, float]]],
+                 metric_type: str = "gauge", labelnames: Sequence[str] = ()) -> CallbackMetric:
+        """Register (or replace) a metric computed on demand"""
+        metric = CallbackMetric(name, documentation, func, metric_type, labelnames)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Union[Counter, Histogram, CallbackMetric]]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            # Modules define their metrics at import; re-importing returns the same object
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as a different type")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+# Process-wide registry that the app, AI service and persistence record into
+metrics = MetricsRegistry()
@@ -1,64 +1,217 @@
+import atexit
+import copy
 import json
 import os
-from typing import List
+import threading
+from typing import TYPE_CHECKING, List, Any, Dict, Optional, Tuple, Callable
 from datetime import datetime
-from models import Todo, Message, TodoPriority, TodoStatus, MessageSender, MessageType
+from models import Todo, Message, encode_todos, decode_todos, encode_messages, decode_messages
+from services.metrics import metrics
+from services.file_lock import InterProcessLock
+
+if TYPE_CHECKING:
+    from services.search_index import SearchIndex
+
+PERSISTENCE_SECONDS = metrics.histogram(
+    'todo_app_persistence_seconds', 'Time spent reading and writing storage files', ('operation', 'file'))
+PERSISTENCE_BYTES = metrics.counter(
+    'todo_app_persistence_bytes_total', 'Bytes read from and written to storage files', ('operation', 'file'))
+PERSISTENCE_ERRORS = metrics.counter(
+    'todo_app_persistence_errors_total', 'Failed storage reads and writes', ('operation', 'file'))
 
 class PersistenceManager:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", write_behind_interval: Optional[float] = None):
         self.data_dir = data_dir
         self.messages_file = os.path.join(data_dir, "messages.json")
         self.todos_file = os.path.join(data_dir, "todos.json")
+        self._encoders = {self.messages_file: encode_messages, self.todos_file: encode_todos}
+        
+        # In-memory copy of each file, keyed by path: (file signature, records)
+        self._cache: Dict[str, Tuple[Optional[Tuple[int, int]], list]] = {}
+        self._lock = threading.RLock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Write-behind: saves only mark a file dirty and a flusher thread writes it
+        self.write_behind_interval = write_behind_interval
+        self._dirty = set()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
         
         # Ensure data directory exists
         os.makedirs(data_dir, exist_ok=True)
+        
+        # Serialize read-modify-write saves with other workers sharing this directory.
+        # Write-behind keeps unsaved changes in memory, so it is single-process only.
+        self._file_locks = {path: InterProcessLock(f"{path}.lock") for path in self._encoders}
+        
+        if write_behind_interval:
+            self._flusher = threading.Thread(target=self._flush_loop, name="persistence-flusher", daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
     
     def load_messages(self) -> List[Message]:
-        """Load messages from JSON file"""
-        if not os.path.exists(self.messages_file):
-            return []
-        
-        try:
-            with open(self.messages_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [Message.from_dict(msg_data) for msg_data in data]
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            print(f"Error loading messages: {e}")
-            return []
+        """Load messages, from memory unless the file changed on disk"""
+        with self._lock:
+            return list(self._load_records(self.messages_file, decode_messages, "messages"))
     
     def save_messages(self, messages: List[Message]) -> None:
         """Save messages to JSON file"""
-        try:
-            with open(self.messages_file, 'w', encoding='utf-8') as f:
-                data = [msg.to_dict() for msg in messages]
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving messages: {e}")
+        with self._file_locks[self.messages_file]:
+            self._save_records(self.messages_file, list(messages), "messages")
+    
+    def load_message_page(self, before_id: Optional[str] = None, limit: int = 50) -> Tuple[List[Message], bool]:
+        """Load up to `limit` messages preceding `before_id` (or the latest ones), oldest first"""
+        with self._lock:
+            messages = self._load_records(self.messages_file, decode_messages, "messages")
+            return page_messages(messages, before_id, limit)
+    
+    def append_message(self, message: Message) -> None:
+        """Append a single message to the history"""
+        with self._file_locks[self.messages_file], self._lock:
+            messages = self.load_messages()
+            messages.append(message)
+            self.save_messages(messages)
     
     def load_todos(self) -> List[Todo]:
-        """Load todos from JSON file"""
-        if not os.path.exists(self.todos_file):
-            return []
-        
-        try:
-            with open(self.todos_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [Todo.from_dict(todo_data) for todo_data in data]
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            print(f"Error loading todos: {e}")
-            return []
+        """Load todos, from memory unless the file changed on disk"""
+        with self._lock:
+            cached = self._load_records(self.todos_file, decode_todos, "todos")
+            
+            # Callers mutate todos in place, so hand out copies
+            return [copy.copy(todo) for todo in cached]
     
     def save_todos(self, todos: List[Todo]) -> None:
         """Save todos to JSON file"""
+        with self._file_locks[self.todos_file]:
+            self._save_records(self.todos_file, [copy.copy(todo) for todo in todos], "todos")
+    
+    def flush(self) -> None:
+        """Write any dirty files to disk now"""
+        with self._flush_lock:
+            with self._lock:
+                pending = [(path, self._cache[path][1]) for path in self._dirty if path in self._cache]
+                self._dirty.clear()
+            
+            for path, records in pending:
+                try:
+                    # Cached records are never mutated, so they can be encoded outside the lock
+                    signature = self._write_records(path, records)
+                except Exception as e:
+                    print(f"Error flushing {os.path.basename(path)}: {e}")
+                    with self._lock:
+                        self._dirty.add(path)
+                    continue
+                
+                with self._lock:
+                    entry = self._cache.get(path)
+                    if entry is not None and entry[1] is records:
+                        self._cache[path] = (signature, records)
+    
+    def close(self) -> None:
+        """Stop the write-behind flusher and flush whatever is still pending"""
+        # Registered for write-behind managers; dropping it lets closed ones be collected
+        atexit.unregister(self.close)
+        self._stop.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=5)
+        self.flush()
+        for lock in self._file_locks.values():
+            lock.close()
+    
+    def save_todo_changes(self, changed: List[Todo], deleted_ids: List[str]) -> None:
+        """Persist a set of added/modified todos and deletions in one save"""
+        with self._file_locks[self.todos_file], self._lock:
+            todos = {todo.id: todo for todo in self.load_todos()}
+            for todo in changed:
+                todos[todo.id] = todo
+            for todo_id in deleted_ids:
+                todos.pop(todo_id, None)
+            self.save_todos(list(todos.values()))
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Return read cache hit/miss counters"""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses}
+    
+    def _save_records(self, path: str, records: list, label: str) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                self._cache[path] = (self._file_signature(path), records)
+                self._dirty.add(path)
+                return
+            
+            try:
+                self._cache[path] = (self._write_records(path, records), records)
+            except Exception as e:
+                self._cache.pop(path, None)
+                print(f"Error saving {label}: {e}")
+    
+    def _write_records(self, path: str, records: list) -> Tuple[int, int]:
+        """Write records and return the signature of the file that was written"""
+        name = os.path.basename(path)
         try:
-            with open(self.todos_file, 'w', encoding='utf-8') as f:
-                data = [todo.to_dict() for todo in todos]
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving todos: {e}")
+            with PERSISTENCE_SECONDS.time(operation='write', file=name):
+                data = self._encoders[path](records)
+                signature = write_bytes_atomic(path, data)
+        except Exception:
+            PERSISTENCE_ERRORS.inc(operation='write', file=name)
+            raise
+        PERSISTENCE_BYTES.inc(len(data), operation='write', file=name)
+        return signature
+    
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.write_behind_interval):
+            self.flush()
+    
+    def _load_records(self, path: str, decode: Callable[[bytes], list], label: str) -> list:
+        """Records of a file, from memory unless it changed on disk; call with self._lock held"""
+        records = self._get_cached(path)
+        if records is None:
+            records, signature = self._read_records(path, decode, label)
+            self._cache[path] = (signature, records)
+        return records
+    
+    def _read_records(self, path: str, decode: Callable[[bytes], list], label: str) -> Tuple[list, Optional[Tuple[int, int]]]:
+        """Decode a file and return its records with the signature of the version that was read"""
+        name = os.path.basename(path)
+        try:
+            with PERSISTENCE_SECONDS.time(operation='read', file=name):
+                with open(path, 'rb') as f:
+                    # Taken from the open handle: another worker may replace the path mid-read
+                    signature = _signature(os.fstat(f.fileno()))
+                    data = f.read()
+                records = decode(data)
+        except FileNotFoundError:
+            return [], None
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            PERSISTENCE_ERRORS.inc(operation='read', file=name)
+            print(f"Error loading {label}: {e}")
+            return [], signature
+        PERSISTENCE_BYTES.inc(len(data), operation='read', file=name)
+        return records, signature
+    
+    def _file_signature(self, path: str) -> Optional[Tuple[int, int]]:
+        try:
+            return _signature(os.stat(path))
+        except FileNotFoundError:
+            return None
+    
+    def _get_cached(self, path: str) -> Optional[list]:
+        entry = self._cache.get(path)
+        # Dirty entries are newer than the file, so they win over whatever is on disk
+        if entry is not None and (path in self._dirty or entry[0] == self._file_signature(path)):
+            self.cache_hits += 1
+            return entry[1]
+        
+        self.cache_misses += 1
+        return None
     
     def clear_all_data(self) -> None:
         """Clear all persisted data (for testing/reset)"""
+        with self._lock:
+            self._cache.clear()
+            self._dirty.clear()
         try:
             if os.path.exists(self.messages_file):
                 os.remove(self.messages_file)
@@ -69,6 +222,7 @@ class PersistenceManager:
     
     def backup_data(self, backup_dir: str = "backup") -> bool:
         """Create a backup of current data"""
+        self.flush()
         try:
             os.makedirs(backup_dir, exist_ok=True)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -88,4 +242,62 @@ class PersistenceManager:
             return True
         except Exception as e:
             print(f"Error creating backup: {e}")
-            return False
\ No newline at end of file
+            return False
+
+def page_messages(messages: List[Message], before_id: Optional[str], limit: int) -> Tuple[List[Message], bool]:
+    """Slice a page out of an in-memory history, scanning back from the newest message"""
+    end = len(messages)
+    if before_id is not None:
+        end = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].id == before_id), 0)
+    
+    start = max(0, end - limit)
+    return messages[start:end], start > 0
+
+def _signature(stat: os.stat_result) -> Tuple[int, int]:
+    return (stat.st_mtime_ns, stat.st_size)
+
+def write_bytes_atomic(path: str, data: bytes) -> Tuple[int, int]:
+    """Write to a temp file and swap it into place so readers never see a partial file.
+    
+    Returns the (mtime, size) signature of the written file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        signature = _signature(os.fstat(f.fileno()))
+    os.replace(tmp_path, path)
+    return signature
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """Atomically write a JSON-serializable value"""
+    write_bytes_atomic(path, json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))
+
+def create_persistence_manager(data_dir: str = "data", search_index: Optional['SearchIndex'] = None) -> PersistenceManager:
+    """Create the persistence backend selected by the TODO_STORAGE environment variable.
+    
+    When a search index is given, the backend is wrapped so every save keeps it current.
+    """
+    manager = _create_backend(data_dir)
+    if search_index is None:
+        return manager
+    
+    from services.search_index import SearchIndexedPersistence
+    return SearchIndexedPersistence(manager, search_index)
+
+def _create_backend(data_dir: str) -> PersistenceManager:
+    backend = os.getenv('TODO_STORAGE', 'json').lower()
+    write_behind_interval = float(os.getenv('TODO_WRITE_BEHIND_INTERVAL', '0')) or None
+    
+    if backend == 'journal':
+        from services.journal import JournalPersistenceManager
+        return JournalPersistenceManager(data_dir)
+    
+    if backend == 'sqlite':
+        from services.sqlite_persistence import SQLitePersistence
+        return SQLitePersistence(data_dir)
+    
+    if backend != 'json':
+        print(f"Unknown TODO_STORAGE backend '{backend}', falling back to json")
+    return PersistenceManager(data_dir, write_behind_interval=write_behind_interval)
@@ -0,0 +1,147 @@
+import json
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from models import Todo, TodoStatus
+
+TODO_KEY_LEGEND = "id, t=title, d=description, p=priority, s=status, due=due date"
+# Tokens kept free for the "(N todos not shown)" line
+SUMMARY_RESERVE_TOKENS = 20
+
+@dataclass
+class TodoPromptState:
+    text: str
+    included: int
+    omitted_open: int
+    omitted_completed: int
+    estimated_tokens: int
+
+    @property
+    def truncated(self) -> bool:
+        return self.omitted_open > 0 or self.omitted_completed > 0
+
+class TodoPromptBuilder:
+    """Renders the todo list for the system prompt within a token budget.
+
+    Todos are written one compact JSON object per line with short keys and no
+    null fields. Open todos come first, ranked by priority then due date;
+    only the most recently completed ones are listed and the rest are
+    summarized as a count.
+    """
+
+    def __init__(self, token_budget: int = 2000, recent_completed: int = 5, chars_per_token: float = 4.0):
+        self.token_budget = token_budget
+        self.recent_completed = recent_completed
+        self.chars_per_token = chars_per_token
+        # Prompt line per todo id, with the serialized todo it was rendered from
+        self._lines: Dict[str, Tuple[str, str]] = {}
+
+    def build(self, todos: List[Todo]) -> TodoPromptState:
+        if not todos:
+            return TodoPromptState("No todos yet.", 0, 0, 0, self.estimate_tokens("No todos yet."))
+
+        open_todos = [todo for todo in todos if todo.status != TodoStatus.COMPLETED]
+        completed = [todo for todo in todos if todo.status == TodoStatus.COMPLETED]
+
+        open_todos.sort(key=self._relevance_key)
+        completed.sort(key=lambda todo: todo.completed_date or datetime.min, reverse=True)
+
+        header = f"Todos (one JSON object per line; keys: {TODO_KEY_LEGEND}):"
+        lines = [header]
+        used = self.estimate_tokens(header)
+        budget = self.token_budget - SUMMARY_RESERVE_TOKENS
+
+        included_open = 0
+        for todo in open_todos:
+            line = self.encode_todo(todo)
+            cost = self.estimate_tokens(line)
+            if used + cost > budget:
+                break
+            lines.append(line)
+            used += cost
+            included_open += 1
+
+        included_completed = 0
+        if included_open == len(open_todos):
+            for todo in completed[:self.recent_completed]:
+                line = self.encode_todo(todo)
+                cost = self.estimate_tokens(line)
+                if used + cost > budget:
+                    break
+                lines.append(line)
+                used += cost
+                included_completed += 1
+
+        if len(self._lines) > 2 * len(todos):
+            # Forget todos that have since been deleted
+            current = {todo.id for todo in todos}
+            self._lines = {todo_id: entry for todo_id, entry in self._lines.items() if todo_id in current}
+
+        omitted_open = len(open_todos) - included_open
+        omitted_completed = len(completed) - included_completed
+        summary = self._summarize_omitted(omitted_open, omitted_completed)
+        if summary:
+            lines.append(summary)
+            used += self.estimate_tokens(summary)
+
+        return TodoPromptState(
+            text="\n".join(lines),
+            included=included_open + included_completed,
+            omitted_open=omitted_open,
+            omitted_completed=omitted_completed,
+            estimated_tokens=used
+        )
+
+    def encode_todo(self, todo: Todo) -> str:
+        """Compact single-line JSON for one todo, reused while the todo is unchanged"""
+        source = todo.to_json()
+        cached = self._lines.get(todo.id)
+        if cached is not None and cached[0] == source:
+            return cached[1]
+        line = self._render_todo(todo)
+        self._lines[todo.id] = (source, line)
+        return line
+
+    @staticmethod
+    def _render_todo(todo: Todo) -> str:
+        record: Dict[str, Any] = {
+            'id': todo.id,
+            't': todo.title,
+            'p': todo.priority.value,
+            's': todo.status.value
+        }
+        if todo.description:
+            record['d'] = todo.description
+        if todo.due_date:
+            record['due'] = _compact_datetime(todo.due_date)
+        return json.dumps(record, separators=(',', ':'), ensure_ascii=False)
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    @staticmethod
+    def _relevance_key(todo: Todo):
+        due = todo.due_date.replace(tzinfo=None) if todo.due_date else None
+        return (
+            -todo.priority.sort_order,
+            due is None,
+            due or datetime.max,
+            todo.created_date
+        )
+
+    @staticmethod
+    def _summarize_omitted(omitted_open: int, omitted_completed: int) -> Optional[str]:
+        parts = []
+        if omitted_open:
+            parts.append(f"{omitted_open} lower-priority open todo{'s' if omitted_open != 1 else ''}")
+        if omitted_completed:
+            parts.append(f"{omitted_completed} older completed todo{'s' if omitted_completed != 1 else ''}")
+        if not parts:
+            return None
+        return f"({' and '.join(parts)} not shown)"
+
+def _compact_datetime(value: datetime) -> str:
+    if value.hour == 0 and value.minute == 0 and value.second == 0 and value.microsecond == 0 and value.tzinfo is None:
+        return value.date().isoformat()
+    return value.isoformat(timespec='minutes')
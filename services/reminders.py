@@ -0,0 +1,129 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from models import Todo, TodoStatus
+from services.todo_index import due_key
+
+class ReminderScheduler:
+    """Background thread that fires on_due when a todo's due date arrives.
+
+    Upcoming deadlines sit in a min-heap. Reschedules and cancellations leave
+    the old heap entry in place and are filtered out when it reaches the top,
+    so every change is O(log n) and the thread only ever looks at the head.
+    Only deadlines still in the future are scheduled.
+    """
+
+    # Upper bound on a single sleep so clock adjustments are noticed
+    MAX_WAIT_SECONDS = 3600.0
+
+    def __init__(self, on_due: Callable[[Todo], None], clock: Callable[[], datetime] = datetime.now):
+        self.on_due = on_due
+        self.clock = clock
+
+        self._heap: List[Tuple[datetime, int, str]] = []
+        # The live deadline for each scheduled todo; heap entries that disagree are stale
+        self._scheduled: Dict[str, Tuple[datetime, Todo]] = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def rebuild(self, todos: Iterable[Todo]) -> None:
+        """Replace the schedule from a full todo list in one pass (used on startup)"""
+        now = self.clock()
+        with self._condition:
+            self._scheduled = {}
+            for todo in todos:
+                deadline = self._deadline(todo, now)
+                if deadline is not None:
+                    self._scheduled[todo.id] = (deadline, todo)
+            self._heap = [(deadline, next(self._counter), todo_id) for todo_id, (deadline, _) in self._scheduled.items()]
+            heapq.heapify(self._heap)
+            self._condition.notify()
+
+    def schedule(self, todo: Todo) -> None:
+        """Add, move or drop a todo's reminder to match its current state"""
+        deadline = self._deadline(todo, self.clock())
+        with self._condition:
+            if deadline is None:
+                self._scheduled.pop(todo.id, None)
+                return
+
+            current = self._scheduled.get(todo.id)
+            self._scheduled[todo.id] = (deadline, todo)
+            if current is not None and current[0] == deadline:
+                return
+
+            heapq.heappush(self._heap, (deadline, next(self._counter), todo.id))
+            if self._heap[0][2] == todo.id:
+                # New earliest deadline; wake the thread so it sleeps less
+                self._condition.notify()
+
+    def cancel(self, todo_id: str) -> None:
+        with self._condition:
+            self._scheduled.pop(todo_id, None)
+
+    def apply_changes(self, changed: List[Todo], deleted_ids: List[str]) -> None:
+        for todo in changed:
+            self.schedule(todo)
+        for todo_id in deleted_ids:
+            self.cancel(todo_id)
+
+    def next_deadline(self) -> Optional[datetime]:
+        with self._condition:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _deadline(self, todo: Todo, now: datetime) -> Optional[datetime]:
+        if todo.due_date is None or todo.status == TodoStatus.COMPLETED:
+            return None
+        deadline = due_key(todo.due_date)
+        return deadline if deadline > now else None
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            deadline, _, todo_id = self._heap[0]
+            current = self._scheduled.get(todo_id)
+            if current is not None and current[0] == deadline:
+                return
+            heapq.heappop(self._heap)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                due: List[Todo] = []
+                while not due:
+                    if self._stopped:
+                        return
+                    self._drop_stale()
+                    if not self._heap:
+                        self._condition.wait(self.MAX_WAIT_SECONDS)
+                        continue
+
+                    delay = (self._heap[0][0] - self.clock()).total_seconds()
+                    if delay > 0:
+                        self._condition.wait(min(delay, self.MAX_WAIT_SECONDS))
+                        continue
+
+                    _, _, todo_id = heapq.heappop(self._heap)
+                    due.append(self._scheduled.pop(todo_id)[1])
+
+            for todo in due:
+                try:
+                    self.on_due(todo)
+                except Exception as e:
+                    print(f"Error sending reminder for todo {todo.id}: {e}")
@@ -0,0 +1,76 @@
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+TODO_UPDATES_MARKER = "TODO_UPDATES:"
+
+class ResponseStreamParser:
+    """Splits a streamed assistant reply into user-visible text and the TODO_UPDATES tail.
+
+    Text is released as soon as it cannot be the start of the marker. Once the
+    marker appears, everything after it is held back for _extract_todo_updates
+    at the end of the stream.
+    """
+
+    def __init__(self, marker: str = TODO_UPDATES_MARKER):
+        self.marker = marker
+        self.marker_seen = False
+        self._parts = []
+        self._held = ""
+
+    @property
+    def text(self) -> str:
+        """Everything received so far, marker and JSON included"""
+        return "".join(self._parts)
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the part of it that is safe to show"""
+        self._parts.append(chunk)
+        if self.marker_seen:
+            return ""
+
+        buffer = self._held + chunk
+        index = buffer.find(self.marker)
+        if index >= 0:
+            self.marker_seen = True
+            self._held = ""
+            return buffer[:index]
+
+        # Hold back a suffix that could be the beginning of a split marker
+        keep = 0
+        for length in range(min(len(self.marker) - 1, len(buffer)), 0, -1):
+            if buffer.endswith(self.marker[:length]):
+                keep = length
+                break
+
+        self._held = buffer[len(buffer) - keep:] if keep else ""
+        return buffer[:len(buffer) - keep]
+
+    def finish(self) -> str:
+        """Release whatever was held back once the stream has ended"""
+        if self.marker_seen:
+            return ""
+        held, self._held = self._held, ""
+        return held
+
+async def iter_sse_events(lines: AsyncIterator[str]) -> AsyncIterator[Dict[str, Any]]:
+    """Decode the JSON payloads of a server-sent-event stream"""
+    data_lines = []
+    async for line in lines:
+        if line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+        elif not line.strip() and data_lines:
+            event = _decode_event("\n".join(data_lines))
+            data_lines = []
+            if event is not None:
+                yield event
+
+    if data_lines:
+        event = _decode_event("\n".join(data_lines))
+        if event is not None:
+            yield event
+
+def _decode_event(data: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        return None
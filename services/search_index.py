@@ -0,0 +1,199 @@
+import bisect
+import copy
+import heapq
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from models import Todo, Message
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Most vocabulary terms a prefix may expand to, so short prefixes stay cheap
+MAX_PREFIX_EXPANSIONS = 64
+
+Record = Union[Message, Todo]
+
+def tokenize(text: str) -> List[str]:
+    """Split text into case-folded word tokens"""
+    return TOKEN_PATTERN.findall(text.casefold())
+
+def _record_kind(record: Record) -> str:
+    return 'todo' if isinstance(record, Todo) else 'message'
+
+def _record_text(record: Record) -> str:
+    if isinstance(record, Todo):
+        return f"{record.title} {record.description or ''}"
+    return record.content
+
+class SearchIndex:
+    """Inverted index over message content and todo titles/descriptions.
+
+    Each document gets an integer number when first indexed, so newer
+    messages have larger numbers and results come back newest first. Terms
+    map to sets of document numbers, and a sorted vocabulary list lets the
+    last query term match as a prefix with a bisect.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings: Dict[str, Set[int]] = {}
+            self._vocabulary: List[str] = []
+            # document number -> (record, its terms, hash of its text)
+            self._docs: Dict[int, Tuple[Record, Tuple[str, ...], int]] = {}
+            self._doc_numbers: Dict[Tuple[str, str], int] = {}
+            self._next_doc = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def rebuild(self, messages: Iterable[Message], todos: Iterable[Todo]) -> None:
+        """Index everything from scratch, sorting the vocabulary once at the end"""
+        with self._lock:
+            self.clear()
+            for record in messages:
+                self._add(record)
+            for todo in todos:
+                self._add(copy.copy(todo))
+            self._vocabulary = sorted(self._postings)
+
+    def upsert(self, record: Record) -> None:
+        """Index a new record or re-index one whose text changed"""
+        if isinstance(record, Todo):
+            record = copy.copy(record)
+        with self._lock:
+            key = (_record_kind(record), record.id)
+            doc = self._doc_numbers.get(key)
+            if doc is None:
+                self._add(record, keep_sorted=True)
+                return
+
+            _, terms, text_hash = self._docs[doc]
+            text = _record_text(record)
+            if hash(text) == text_hash:
+                # Only non-text fields changed; keep the postings
+                self._docs[doc] = (record, terms, text_hash)
+                return
+
+            self._unindex(doc, terms)
+            self._index(doc, record, text, keep_sorted=True)
+
+    def remove(self, kind: str, record_id: str) -> None:
+        with self._lock:
+            doc = self._doc_numbers.pop((kind, record_id), None)
+            if doc is not None:
+                _, terms, _ = self._docs.pop(doc)
+                self._unindex(doc, terms)
+
+    def sync(self, kind: str, records: List[Record]) -> None:
+        """Make the indexed records of one kind match a full list of them"""
+        with self._lock:
+            keep = {record.id for record in records}
+            for stale_kind, record_id in [key for key in self._doc_numbers if key[0] == kind and key[1] not in keep]:
+                self.remove(stale_kind, record_id)
+            for record in records:
+                self.upsert(record)
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 20) -> List[Record]:
+        """Records matching every query term, newest first; the last term matches as a prefix"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            matches: List[Set[int]] = []
+            for term in terms[:-1]:
+                matches.append(self._postings.get(term, set()))
+            matches.append(self._prefix_postings(terms[-1]))
+
+            matches.sort(key=len)
+            docs = matches[0].intersection(*matches[1:]) if len(matches) > 1 else matches[0]
+            if kinds is not None:
+                kinds = set(kinds)
+                docs = (doc for doc in docs if _record_kind(self._docs[doc][0]) in kinds)
+            return [self._docs[doc][0] for doc in heapq.nlargest(limit, docs)]
+
+    def _prefix_postings(self, prefix: str) -> Set[int]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        docs: Set[int] = set()
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            docs |= self._postings[term]
+        return docs
+
+    def _add(self, record: Record, keep_sorted: bool = False) -> None:
+        doc = self._next_doc
+        self._next_doc += 1
+        self._doc_numbers[(_record_kind(record), record.id)] = doc
+        self._index(doc, record, _record_text(record), keep_sorted)
+
+    def _index(self, doc: int, record: Record, text: str, keep_sorted: bool) -> None:
+        terms = tuple(set(tokenize(text)))
+        self._docs[doc] = (record, terms, hash(text))
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = set()
+                if keep_sorted:
+                    bisect.insort(self._vocabulary, term)
+            postings.add(doc)
+
+    def _unindex(self, doc: int, terms: Tuple[str, ...]) -> None:
+        for term in terms:
+            postings = self._postings[term]
+            postings.discard(doc)
+            if not postings:
+                del self._postings[term]
+                i = bisect.bisect_left(self._vocabulary, term)
+                if i < len(self._vocabulary) and self._vocabulary[i] == term:
+                    del self._vocabulary[i]
+
+class SearchIndexedPersistence:
+    """Wraps a persistence backend and keeps a SearchIndex current on every save.
+
+    Reads and anything else not listed here pass straight through to the
+    backend, so it works the same over the JSON, journal and SQLite stores.
+    """
+
+    def __init__(self, backend: Any, search_index: SearchIndex):
+        self.backend = backend
+        self.search_index = search_index
+        search_index.rebuild(backend.load_messages(), backend.load_todos())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.backend, name)
+
+    def save_messages(self, messages: List[Message]) -> None:
+        self.backend.save_messages(messages)
+        self.search_index.sync('message', messages)
+
+    def append_message(self, message: Message) -> None:
+        self.backend.append_message(message)
+        self.search_index.upsert(message)
+
+    def save_todos(self, todos: List[Todo]) -> None:
+        self.backend.save_todos(todos)
+        self.search_index.sync('todo', todos)
+
+    def save_todo_changes(self, changed: List[Todo], deleted_ids: List[str]) -> None:
+        self.backend.save_todo_changes(changed, deleted_ids)
+        for todo in changed:
+            self.search_index.upsert(todo)
+        for todo_id in deleted_ids:
+            self.search_index.remove('todo', todo_id)
+
+    def upsert_todo(self, todo: Todo) -> None:
+        self.backend.upsert_todo(todo)
+        self.search_index.upsert(todo)
+
+    def delete_todo(self, todo_id: str) -> None:
+        self.backend.delete_todo(todo_id)
+        self.search_index.remove('todo', todo_id)
+
+    def clear_all_data(self) -> None:
+        self.backend.clear_all_data()
+        self.search_index.clear()
+
@@ -0,0 +1,324 @@
+import os
+import sqlite3
+import threading
+import weakref
+from datetime import datetime
+from typing import List, Optional, Tuple
+from models import Todo, Message, TodoPriority, TodoStatus, MessageSender, MessageType
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    content TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    message_type TEXT NOT NULL DEFAULT 'text'
+);
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages (timestamp);
+
+CREATE TABLE IF NOT EXISTS todos (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    priority TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_date TEXT NOT NULL,
+    due_date TEXT,
+    completed_date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_todos_status ON todos (status);
+CREATE INDEX IF NOT EXISTS idx_todos_due_date ON todos (due_date);
+CREATE INDEX IF NOT EXISTS idx_todos_position ON todos (position);
+"""
+
+MESSAGE_COLUMNS = "id, content, sender, timestamp, message_type"
+TODO_COLUMNS = "id, title, description, priority, status, created_date, due_date, completed_date"
+
+class _Connection(sqlite3.Connection):
+    """sqlite3 connection that can be weakly referenced"""
+
+class SQLitePersistence:
+    """SQLite storage with the same interface as PersistenceManager.
+
+    Runs in WAL mode so readers never block the writer, and adds row-level
+    operations so a chat turn touches only the rows it changes.
+    """
+
+    def __init__(self, data_dir: str = "data", db_name: str = "todo_app.db"):
+        self.data_dir = data_dir
+        self.db_file = os.path.join(data_dir, db_name)
+        self._local = threading.local()
+        # Every thread's open connection, so close() can reach them all. Weak, so a
+        # connection still goes away with its thread as it does without the registry.
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+
+        os.makedirs(data_dir, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+        self._import_json_if_empty()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or conn not in self._connections:
+            # Only the owning thread uses it, but close() may run on another thread
+            conn = sqlite3.connect(self.db_file, timeout=10, check_same_thread=False, factory=_Connection)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.add(conn)
+        return conn
+
+    # Messages
+
+    def load_messages(self) -> List[Message]:
+        """Load messages in the order they were added"""
+        try:
+            rows = self._connection().execute(
+                f"SELECT {MESSAGE_COLUMNS} FROM messages ORDER BY seq"
+            ).fetchall()
+            return [self._row_to_message(row) for row in rows]
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error loading messages: {e}")
+            return []
+
+    def load_message_page(self, before_id: Optional[str] = None, limit: int = 50) -> Tuple[List[Message], bool]:
+        """Load up to `limit` messages preceding `before_id` (or the latest ones), oldest first"""
+        try:
+            conn = self._connection()
+            if before_id is None:
+                rows = conn.execute(
+                    f"SELECT {MESSAGE_COLUMNS} FROM messages ORDER BY seq DESC LIMIT ?",
+                    (limit + 1,)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT {MESSAGE_COLUMNS} FROM messages "
+                    "WHERE seq < (SELECT seq FROM messages WHERE id = ?) ORDER BY seq DESC LIMIT ?",
+                    (before_id, limit + 1)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error loading messages: {e}")
+            return [], False
+
+        has_more = len(rows) > limit
+        return [self._row_to_message(row) for row in reversed(rows[:limit])], has_more
+
+    def save_messages(self, messages: List[Message]) -> None:
+        """Replace the stored history with the given messages"""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("DELETE FROM messages")
+                conn.executemany(
+                    f"INSERT INTO messages ({MESSAGE_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                    [self._message_to_row(msg) for msg in messages]
+                )
+        except sqlite3.Error as e:
+            print(f"Error saving messages: {e}")
+
+    def append_message(self, message: Message) -> None:
+        """Insert a single message row"""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT OR IGNORE INTO messages ({MESSAGE_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                    self._message_to_row(message)
+                )
+        except sqlite3.Error as e:
+            print(f"Error saving message: {e}")
+
+    # Todos
+
+    def load_todos(self) -> List[Todo]:
+        """Load todos in their stored order"""
+        try:
+            rows = self._connection().execute(
+                f"SELECT {TODO_COLUMNS} FROM todos ORDER BY position"
+            ).fetchall()
+            return [self._row_to_todo(row) for row in rows]
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error loading todos: {e}")
+            return []
+
+    def save_todos(self, todos: List[Todo]) -> None:
+        """Upsert the given todos and delete any that are no longer present"""
+        conn = self._connection()
+        try:
+            with conn:
+                keep = {todo.id for todo in todos}
+                existing = [row[0] for row in conn.execute("SELECT id FROM todos")]
+                conn.executemany(
+                    "DELETE FROM todos WHERE id = ?",
+                    [(todo_id,) for todo_id in existing if todo_id not in keep]
+                )
+                conn.executemany(
+                    self._upsert_sql(),
+                    [self._todo_to_row(todo) + (position,) for position, todo in enumerate(todos)]
+                )
+        except sqlite3.Error as e:
+            print(f"Error saving todos: {e}")
+
+    def save_todo_changes(self, changed: List[Todo], deleted_ids: List[str]) -> None:
+        """Upsert and delete just the affected rows in one transaction"""
+        conn = self._connection()
+        try:
+            with conn:
+                position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM todos").fetchone()[0]
+                conn.executemany(
+                    self._upsert_sql(),
+                    [self._todo_to_row(todo) + (position + offset,) for offset, todo in enumerate(changed)]
+                )
+                conn.executemany("DELETE FROM todos WHERE id = ?", [(todo_id,) for todo_id in deleted_ids])
+        except sqlite3.Error as e:
+            print(f"Error saving todos: {e}")
+
+    def upsert_todo(self, todo: Todo) -> None:
+        """Insert a new todo at the end of the list or update an existing one in place"""
+        conn = self._connection()
+        try:
+            with conn:
+                position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM todos").fetchone()[0]
+                conn.execute(self._upsert_sql(), self._todo_to_row(todo) + (position,))
+        except sqlite3.Error as e:
+            print(f"Error saving todo: {e}")
+
+    def delete_todo(self, todo_id: str) -> None:
+        """Delete a todo by id"""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+        except sqlite3.Error as e:
+            print(f"Error deleting todo: {e}")
+
+    # Maintenance
+
+    def clear_all_data(self) -> None:
+        """Clear all persisted data (for testing/reset)"""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("DELETE FROM messages")
+                conn.execute("DELETE FROM todos")
+        except sqlite3.Error as e:
+            print(f"Error clearing data: {e}")
+
+    def backup_data(self, backup_dir: str = "backup") -> bool:
+        """Create a consistent copy of the database using SQLite's online backup"""
+        try:
+            os.makedirs(backup_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            backup_file = os.path.join(backup_dir, f"todo_app_{timestamp}.db")
+
+            dest = sqlite3.connect(backup_file)
+            try:
+                self._connection().backup(dest)
+            finally:
+                dest.close()
+            return True
+        except Exception as e:
+            print(f"Error creating backup: {e}")
+            return False
+
+    def close(self) -> None:
+        """Close the connections of every thread that used this store"""
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Error closing database connection: {e}")
+        self._local.conn = None
+
+    # Row conversion
+
+    def _import_json_if_empty(self) -> None:
+        """Carry over data from the JSON files the first time the database is used"""
+        conn = self._connection()
+        has_data = conn.execute(
+            "SELECT EXISTS(SELECT 1 FROM messages) OR EXISTS(SELECT 1 FROM todos)"
+        ).fetchone()[0]
+        if has_data:
+            return
+
+        from services.persistence import PersistenceManager
+        legacy = PersistenceManager(self.data_dir)
+        if os.path.exists(legacy.messages_file):
+            self.save_messages(legacy.load_messages())
+        if os.path.exists(legacy.todos_file):
+            self.save_todos(legacy.load_todos())
+
+    @staticmethod
+    def _upsert_sql() -> str:
+        return (
+            f"INSERT INTO todos ({TODO_COLUMNS}, position) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET "
+            "title = excluded.title, description = excluded.description, "
+            "priority = excluded.priority, status = excluded.status, "
+            "created_date = excluded.created_date, due_date = excluded.due_date, "
+            "completed_date = excluded.completed_date"
+        )
+
+    @staticmethod
+    def _message_to_row(message: Message) -> Tuple:
+        # Built from the cached serialized form, so the event emitted for it reuses the work
+        record = message.to_dict()
+        return (
+            record['id'],
+            record['content'],
+            record['sender'],
+            record['timestamp'],
+            record['message_type']
+        )
+
+    @staticmethod
+    def _row_to_message(row: Tuple) -> Message:
+        return Message(
+            id=row[0],
+            content=row[1],
+            sender=MessageSender(row[2]),
+            timestamp=datetime.fromisoformat(row[3]),
+            message_type=MessageType(row[4] or 'text')
+        )
+
+    @staticmethod
+    def _todo_to_row(todo: Todo) -> Tuple:
+        record = todo.to_dict()
+        return (
+            record['id'],
+            record['title'],
+            record['description'],
+            record['priority'],
+            record['status'],
+            record['created_date'],
+            record['due_date'],
+            record['completed_date']
+        )
+
+    @staticmethod
+    def _row_to_todo(row: Tuple) -> Todo:
+        return Todo(
+            id=row[0],
+            title=row[1],
+            description=row[2],
+            priority=TodoPriority(row[3]),
+            status=TodoStatus(row[4]),
+            created_date=datetime.fromisoformat(row[5]),
+            due_date=_parse_optional_datetime(row[6]),
+            completed_date=_parse_optional_datetime(row[7])
+        )
+
+def _parse_optional_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
@@ -0,0 +1,136 @@
+import bisect
+import copy
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from models import Todo, TodoPriority, TodoStatus
+
+# Sort keys accepted by query(); prefix with "-" to reverse
+SORT_KEYS = {
+    'priority': lambda todo: -todo.priority.sort_order,
+    'due': lambda todo: (todo.due_date is None, due_key(todo.due_date) if todo.due_date else datetime.max),
+    'created': lambda todo: todo.created_date,
+    'title': lambda todo: todo.title.lower()
+}
+
+def due_key(value: datetime) -> datetime:
+    """Comparable form of a due date; aware datetimes are converted to naive local time"""
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+class TodoIndex:
+    """In-memory secondary indexes over todos, kept current one change at a time.
+
+    Status and priority map to sets of ids; due dates live in a sorted list of
+    (due, id) pairs so range filters are a bisect plus a slice. A query starts
+    from the narrowest index that applies, so its cost follows the size of
+    the result rather than the size of the list.
+    """
+
+    def __init__(self, todos: Iterable[Todo] = ()):
+        self._lock = threading.RLock()
+        self.rebuild(todos)
+
+    def rebuild(self, todos: Iterable[Todo]) -> None:
+        with self._lock:
+            self._todos: Dict[str, Todo] = {}
+            # Insertion sequence per id, to order results drawn from the sets
+            self._seq: Dict[str, int] = {}
+            self._next_seq = 0
+            self._by_status: Dict[TodoStatus, Set[str]] = {status: set() for status in TodoStatus}
+            self._by_priority: Dict[TodoPriority, Set[str]] = {priority: set() for priority in TodoPriority}
+            self._due: List[Tuple[datetime, str]] = []
+            for todo in todos:
+                self._add(copy.copy(todo))
+            self._due.sort()
+
+    def __len__(self) -> int:
+        return len(self._todos)
+
+    def upsert(self, todo: Todo) -> None:
+        with self._lock:
+            todo = copy.copy(todo)
+            previous = self._todos.get(todo.id)
+            if previous is None:
+                self._add(todo, keep_sorted=True)
+                return
+
+            self._unindex(previous)
+            self._todos[todo.id] = todo  # keeps the todo's position in the ordered view
+            self._index(todo, keep_sorted=True)
+
+    def remove(self, todo_id: str) -> None:
+        with self._lock:
+            todo = self._todos.pop(todo_id, None)
+            if todo is not None:
+                del self._seq[todo_id]
+                self._unindex(todo)
+
+    def apply_changes(self, changed: List[Todo], deleted_ids: List[str]) -> None:
+        with self._lock:
+            for todo in changed:
+                self.upsert(todo)
+            for todo_id in deleted_ids:
+                self.remove(todo_id)
+
+    def query(self, statuses: Optional[List[TodoStatus]] = None, priorities: Optional[List[TodoPriority]] = None,
+              due_before: Optional[datetime] = None, due_after: Optional[datetime] = None,
+              sort: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Todo]:
+        """Filter, sort and limit todos using the indexes"""
+        with self._lock:
+            candidates: List[Set[str]] = []
+            if statuses:
+                candidates.append(set().union(*(self._by_status[status] for status in statuses)))
+            if priorities:
+                candidates.append(set().union(*(self._by_priority[priority] for priority in priorities)))
+            if due_before is not None or due_after is not None:
+                candidates.append(self._due_range(due_after, due_before))
+
+            if candidates:
+                candidates.sort(key=len)
+                ids = candidates[0].intersection(*candidates[1:])
+                # Sets are unordered; put the results back in list order
+                results = sorted((self._todos[todo_id] for todo_id in ids), key=lambda todo: self._seq[todo.id])
+            else:
+                results = list(self._todos.values())
+
+        if sort:
+            # Stable sorts applied from the least to the most significant key
+            for key in reversed(sort):
+                reverse = key.startswith('-')
+                results.sort(key=SORT_KEYS[key.lstrip('-')], reverse=reverse)
+
+        if limit is not None:
+            results = results[:limit]
+        return [copy.copy(todo) for todo in results]
+
+    def _due_range(self, after: Optional[datetime], before: Optional[datetime]) -> Set[str]:
+        start = bisect.bisect_left(self._due, (due_key(after), '')) if after is not None else 0
+        end = bisect.bisect_left(self._due, (due_key(before), '')) if before is not None else len(self._due)
+        return {todo_id for _, todo_id in self._due[start:end]}
+
+    def _add(self, todo: Todo, keep_sorted: bool = False) -> None:
+        self._todos[todo.id] = todo
+        self._seq[todo.id] = self._next_seq
+        self._next_seq += 1
+        self._index(todo, keep_sorted)
+
+    def _index(self, todo: Todo, keep_sorted: bool) -> None:
+        self._by_status[todo.status].add(todo.id)
+        self._by_priority[todo.priority].add(todo.id)
+        if todo.due_date is not None:
+            entry = (due_key(todo.due_date), todo.id)
+            if keep_sorted:
+                bisect.insort(self._due, entry)
+            else:
+                self._due.append(entry)
+
+    def _unindex(self, todo: Todo) -> None:
+        self._by_status[todo.status].discard(todo.id)
+        self._by_priority[todo.priority].discard(todo.id)
+        if todo.due_date is not None:
+            entry = (due_key(todo.due_date), todo.id)
+            i = bisect.bisect_left(self._due, entry)
+            if i < len(self._due) and self._due[i] == entry:
+                del self._due[i]
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import Todo, TodoUpdate, TodoPriority, TodoStatus
+
+class UpdateOutcome(Enum):
+    APPLIED = "applied"
+    UNKNOWN_ID = "unknown_id"
+    NO_OP = "no_op"
+    INVALID = "invalid"
+
+@dataclass
+class UpdateResult:
+    update: TodoUpdate
+    outcome: UpdateOutcome
+    todo: Optional[Todo] = None  # the todo after the change, or the removed todo for deletes
+
+    @property
+    def applied(self) -> bool:
+        return self.outcome == UpdateOutcome.APPLIED
+
+class TodoStore:
+    """Todos indexed by id, iterated in insertion order.
+
+    Applying a batch of k updates costs O(k) regardless of how many todos
+    there are, and every update reports what it actually did.
+    """
+
+    def __init__(self, todos: Iterable[Todo] = ()):
+        self._todos: Dict[str, Todo] = {todo.id: todo for todo in todos}
+
+    def __len__(self) -> int:
+        return len(self._todos)
+
+    def __contains__(self, todo_id: str) -> bool:
+        return todo_id in self._todos
+
+    def get(self, todo_id: str) -> Optional[Todo]:
+        return self._todos.get(todo_id)
+
+    def todos(self) -> List[Todo]:
+        """Ordered view of the current todos"""
+        return list(self._todos.values())
+
+    def apply(self, updates: List[TodoUpdate]) -> List[UpdateResult]:
+        """Apply a batch of updates in order and report the outcome of each"""
+        return [self.apply_one(update) for update in updates]
+
+    def apply_one(self, update: TodoUpdate) -> UpdateResult:
+        if update.action == "add":
+            todo = Todo(
+                title=update.title or "New Todo",
+                description=update.description,
+                priority=update.priority or TodoPriority.MEDIUM,
+                due_date=update.due_date
+            )
+            self._todos[todo.id] = todo
+            return UpdateResult(update, UpdateOutcome.APPLIED, todo)
+
+        if update.action not in ("complete", "update", "delete") or not update.todo_id:
+            return UpdateResult(update, UpdateOutcome.INVALID)
+
+        todo = self._todos.get(update.todo_id)
+        if todo is None:
+            return UpdateResult(update, UpdateOutcome.UNKNOWN_ID)
+
+        if update.action == "delete":
+            del self._todos[update.todo_id]
+            return UpdateResult(update, UpdateOutcome.APPLIED, todo)
+
+        if update.action == "complete":
+            if todo.status == TodoStatus.COMPLETED:
+                return UpdateResult(update, UpdateOutcome.NO_OP, todo)
+            todo.mark_completed()
+            return UpdateResult(update, UpdateOutcome.APPLIED, todo)
+
+        changed = False
+        for field_name in ("title", "description", "priority", "due_date"):
+            value = getattr(update, field_name)
+            if value and getattr(todo, field_name) != value:
+                setattr(todo, field_name, value)
+                changed = True
+        return UpdateResult(update, UpdateOutcome.APPLIED if changed else UpdateOutcome.NO_OP, todo)
+
+def summarize_results(results: List[UpdateResult]) -> Tuple[List[Todo], List[str]]:
+    """Collapse per-update results into the final changed todos and deleted ids"""
+    final: Dict[str, Tuple[str, Todo]] = {}
+    for result in results:
+        if not result.applied:
+            continue
+        state = "deleted" if result.update.action == "delete" else "changed"
+        final[result.todo.id] = (state, result.todo)
+
+    changed = [todo for state, todo in final.values() if state == "changed"]
+    deleted_ids = [todo_id for todo_id, (state, _) in final.items() if state == "deleted"]
+    return changed, deleted_ids
@@ -0,0 +1,68 @@
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Any, Iterable
+from models import Todo
+
+@dataclass
+class TodoDelta:
+    revision: int
+    event: str  # todo_changed, todo_deleted
+    todo_id: str
+    todo: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.event == 'todo_deleted':
+            return {'revision': self.revision, 'todo_id': self.todo_id}
+        return {'revision': self.revision, 'todo': self.todo}
+
+class TodoSyncLog:
+    """Versioned history of todo changes for delta-based client sync.
+
+    Every change gets the next revision number. A bounded window of recent
+    deltas is kept so reconnecting clients can catch up without a full
+    snapshot. The epoch changes on every restart, which invalidates revisions
+    that clients remember from an earlier server process.
+    """
+
+    def __init__(self, max_deltas: int = 500):
+        self.epoch = uuid.uuid4().hex
+        self.revision = 0
+        self._deltas = deque(maxlen=max_deltas)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Start a new epoch, e.g. after changes were missed; clients then resync from a snapshot"""
+        with self._lock:
+            self.epoch = uuid.uuid4().hex
+            self.revision = 0
+            self._deltas.clear()
+
+    def record(self, changed: Iterable[Todo], deleted_ids: Iterable[str]) -> List[TodoDelta]:
+        """Assign revisions to a set of changes and remember them"""
+        with self._lock:
+            deltas = []
+            for todo in changed:
+                self.revision += 1
+                deltas.append(TodoDelta(self.revision, 'todo_changed', todo.id, todo.to_dict()))
+            for todo_id in deleted_ids:
+                self.revision += 1
+                deltas.append(TodoDelta(self.revision, 'todo_deleted', todo_id))
+            self._deltas.extend(deltas)
+            return deltas
+
+    def deltas_since(self, epoch: Optional[str], revision: Optional[int]) -> Optional[List[TodoDelta]]:
+        """Return the deltas after `revision`, or None when a full snapshot is needed"""
+        with self._lock:
+            if epoch != self.epoch or revision is None or revision > self.revision:
+                return None
+            if revision == self.revision:
+                return []
+
+            oldest = self._deltas[0].revision if self._deltas else self.revision + 1
+            if revision + 1 < oldest:
+                # Client is further behind than the retained window
+                return None
+
+            return [delta for delta in self._deltas if delta.revision > revision]
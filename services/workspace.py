@@ -0,0 +1,197 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from models import Todo
+from services.persistence import create_persistence_manager
+from services.todo_sync import TodoSyncLog
+from services.todo_index import TodoIndex
+from services.reminders import ReminderScheduler
+from services.search_index import SearchIndex
+from services.http_cache import RevisionCounter
+from services.file_lock import InterProcessLock
+from services.conversation_memory import ConversationMemory
+
+DEFAULT_WORKSPACE = "default"
+WORKSPACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def valid_workspace_id(workspace_id: str) -> bool:
+    return bool(WORKSPACE_ID_PATTERN.match(workspace_id or ""))
+
+class Workspace:
+    """Storage and in-memory indexes for one workspace's messages and todos"""
+
+    def __init__(self, workspace_id: str, data_dir: str, on_due: Callable[['Workspace', Todo], None],
+                 memory_factory: Callable[[], ConversationMemory] = ConversationMemory):
+        self.id = workspace_id
+        self.data_dir = data_dir
+        # Socket.IO room holding this workspace's clients
+        self.room = f"workspace:{workspace_id}"
+
+        self.search_index = SearchIndex()
+        self.persistence = create_persistence_manager(data_dir, search_index=self.search_index)
+        self.todo_sync = TodoSyncLog()
+        self.message_revision = RevisionCounter()
+        # Serializes load-apply-save of todos across threads and workers
+        self.todo_write_lock = InterProcessLock(os.path.join(data_dir, 'todo_updates.lock'))
+
+        todos = self.persistence.load_todos()
+        self.todo_index = TodoIndex(todos)
+        self.reminders = ReminderScheduler(lambda todo: on_due(self, todo))
+        self.reminders.rebuild(todos)
+        self.reminders.start()
+
+        # Recent chat turns for the AI context, starting from the stored history
+        self.memory = memory_factory()
+        self.memory.seed(self.persistence.load_message_page(None, self.memory.window_messages)[0])
+
+        # Connections and in-flight turns using this workspace; it is never evicted while > 0
+        self.users = 0
+
+    def close(self) -> None:
+        self.reminders.stop()
+        try:
+            self.persistence.close()
+        except Exception as e:
+            print(f"Error closing workspace {self.id}: {e}")
+        self.todo_write_lock.close()
+
+class WorkspaceManager:
+    """Loads workspaces on first use and evicts idle ones beyond a limit.
+
+    The default workspace lives directly in the root data directory, so
+    existing single-user data keeps working; others get their own directory
+    under workspaces/. Workspaces in use (connected clients, running turns)
+    are pinned; among the rest the least recently used are closed first.
+    Loading and closing happen outside the manager lock, so a slow one only
+    holds up callers of that same workspace.
+    """
+
+    def __init__(self, root_dir: str = "data", max_loaded: int = 32,
+                 on_due: Optional[Callable[[Workspace, Todo], None]] = None,
+                 memory_factory: Callable[[], ConversationMemory] = ConversationMemory):
+        self.root_dir = root_dir
+        self.max_loaded = max_loaded
+        self.on_due = on_due or (lambda workspace, todo: None)
+        self.memory_factory = memory_factory
+        self._workspaces: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        # Per-id locks held while a workspace loads, and events set once an evicted one has closed
+        self._loading: Dict[str, threading.Lock] = {}
+        self._closing: Dict[str, threading.Event] = {}
+        self.evictions = 0
+
+    def data_dir_for(self, workspace_id: str) -> str:
+        if workspace_id == DEFAULT_WORKSPACE:
+            return self.root_dir
+        return os.path.join(self.root_dir, "workspaces", workspace_id)
+
+    def exists(self, workspace_id: str) -> bool:
+        """Whether the workspace is loaded or has data on disk; never creates it"""
+        if workspace_id == DEFAULT_WORKSPACE or self.peek(workspace_id) is not None:
+            return True
+        return valid_workspace_id(workspace_id) and os.path.isdir(self.data_dir_for(workspace_id))
+
+    def acquire(self, workspace_id: str) -> Workspace:
+        """Load (if needed) and pin a workspace; pair with release()"""
+        if not valid_workspace_id(workspace_id):
+            raise ValueError(f"invalid workspace id: {workspace_id!r}")
+
+        while True:
+            with self._lock:
+                workspace = self._workspaces.get(workspace_id)
+                if workspace is not None:
+                    evicted = self._pin(workspace)
+                    break
+                load_lock = self._loading.setdefault(workspace_id, threading.Lock())
+
+            with load_lock:
+                with self._lock:
+                    if workspace_id in self._workspaces:
+                        # Another thread loaded it while this one waited
+                        continue
+                    closing = self._closing.get(workspace_id)
+                if closing is not None:
+                    # The evicted instance is still flushing the same files
+                    closing.wait()
+                try:
+                    workspace = Workspace(workspace_id, self.data_dir_for(workspace_id), self.on_due, self.memory_factory)
+                except BaseException:
+                    with self._lock:
+                        self._loading.pop(workspace_id, None)
+                    raise
+                with self._lock:
+                    self._loading.pop(workspace_id, None)
+                    self._workspaces[workspace_id] = workspace
+                    evicted = self._pin(workspace)
+                break
+
+        self._close(evicted)
+        return workspace
+
+    def release(self, workspace: Workspace) -> None:
+        with self._lock:
+            workspace.users -= 1
+            evicted = self._evict_idle()
+        self._close(evicted)
+
+    @contextmanager
+    def using(self, workspace_id: str) -> Iterator[Workspace]:
+        workspace = self.acquire(workspace_id)
+        try:
+            yield workspace
+        finally:
+            self.release(workspace)
+
+    def peek(self, workspace_id: str) -> Optional[Workspace]:
+        """The workspace if it is loaded in this process, without loading it"""
+        with self._lock:
+            return self._workspaces.get(workspace_id)
+
+    def loaded(self) -> List[Workspace]:
+        with self._lock:
+            return list(self._workspaces.values())
+
+    def close_all(self) -> None:
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+            self._workspaces.clear()
+            self._mark_closing(workspaces)
+        self._close(workspaces)
+
+    def _pin(self, workspace: Workspace) -> List[Workspace]:
+        """Mark a loaded workspace as used; returns idle ones to close. Call with self._lock held"""
+        self._workspaces.move_to_end(workspace.id)
+        workspace.users += 1
+        return self._evict_idle()
+
+    def _evict_idle(self) -> List[Workspace]:
+        """Drop idle workspaces over the limit, least recently used first; caller closes them"""
+        excess = len(self._workspaces) - self.max_loaded
+        if excess <= 0:
+            return []
+        idle = [workspace for workspace in self._workspaces.values() if workspace.users == 0][:excess]
+        for workspace in idle:
+            del self._workspaces[workspace.id]
+            self.evictions += 1
+        self._mark_closing(idle)
+        return idle
+
+    def _mark_closing(self, workspaces: List[Workspace]) -> None:
+        for workspace in workspaces:
+            self._closing[workspace.id] = threading.Event()
+
+    def _close(self, workspaces: List[Workspace]) -> None:
+        # Outside the manager lock: closing may flush or compact storage
+        for workspace in workspaces:
+            try:
+                workspace.close()
+            finally:
+                with self._lock:
+                    self._closing.pop(workspace.id).set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'loaded': len(self._workspaces), 'evictions': self.evictions}
@@ -1,5 +1,13 @@
-// Socket.IO connection
-const socket = io();
+// Workspace picked by the ?workspace= URL parameter; the server uses "default" when absent
+const workspaceId = new URLSearchParams(window.location.search).get('workspace') || undefined;
+
+// Socket.IO connection; the auth payload selects the workspace and lets a
+// reconnecting client catch up on todo deltas
+const socket = io({
+    auth: function(cb) {
+        cb({ workspace: workspaceId, todo_epoch: todoEpoch, todo_revision: todoRevision });
+    }
+});
 
 // DOM elements
 const messagesArea = document.getElementById('messagesArea');
@@ -10,6 +18,12 @@ const todosList = document.getElementById('todosList');
 
 // State
 let isProcessing = false;
+let historyCursor = null;
+let hasMoreHistory = false;
+let isLoadingHistory = false;
+let todosById = new Map();
+let todoEpoch = null;
+let todoRevision = null;
 
 // Initialize
 document.addEventListener('DOMContentLoaded', function() {
@@ -36,17 +50,41 @@ function setupEventListeners() {
     
     socket.on('initial_data', function(data) {
         displayMessages(data.messages);
-        updateTodos(data.todos);
+        historyCursor = data.before;
+        hasMoreHistory = data.has_more;
+        applyTodoSync(data.todo_sync);
         scrollToBottom();
     });
     
+    socket.on('todos_sync', applyTodoSync);
+    
+    socket.on('todo_changed', function(delta) {
+        applyTodoDelta('todo_changed', delta);
+    });
+    
+    socket.on('todo_deleted', function(delta) {
+        applyTodoDelta('todo_deleted', delta);
+    });
+    
+    socket.on('todo_due', function(todo) {
+        showReminder(todo);
+    });
+    
+    socket.on('history_page', function(page) {
+        prependMessages(page.messages);
+        historyCursor = page.before || historyCursor;
+        hasMoreHistory = page.has_more;
+        isLoadingHistory = false;
+    });
+    
     socket.on('new_message', function(message) {
         displayMessage(message);
         scrollToBottom();
     });
     
-    socket.on('todos_updated', function(todos) {
-        updateTodos(todos);
+    socket.on('message_delta', function(delta) {
+        appendMessageDelta(delta);
+        scrollToBottom();
     });
     
     socket.on('disconnect', function() {
@@ -85,7 +123,78 @@ function displayMessages(messages) {
     messages.forEach(message => displayMessage(message));
 }
 
+function loadOlderMessages() {
+    if (!hasMoreHistory || isLoadingHistory || !historyCursor) return;
+    
+    isLoadingHistory = true;
+    socket.emit('load_history', { before: historyCursor });
+}
+
+function prependMessages(messages) {
+    // Keep the viewport anchored on the message the user was looking at
+    const previousHeight = messagesArea.scrollHeight;
+    const fragment = document.createDocumentFragment();
+    messages.forEach(message => fragment.appendChild(createMessageElement(message)));
+    messagesArea.insertBefore(fragment, messagesArea.firstChild);
+    messagesArea.scrollTop += messagesArea.scrollHeight - previousHeight;
+    
+    updateMessageFading();
+}
+
 function displayMessage(message) {
+    const element = createMessageElement(message);
+    const streamed = findMessageElement(message.id);
+    
+    // A streamed reply is replaced by its final text once the turn completes
+    if (streamed) {
+        streamed.replaceWith(element);
+    } else {
+        messagesArea.appendChild(element);
+    }
+    
+    // Stop processing after assistant message
+    if (message.sender === 'assistant') {
+        setProcessing(false);
+    }
+    
+    // Update fading effect
+    updateMessageFading();
+}
+
+function appendMessageDelta(delta) {
+    let messageDiv = findMessageElement(delta.id);
+    
+    if (!messageDiv) {
+        hideTypingIndicator();
+        messageDiv = createMessageElement({
+            id: delta.id,
+            content: '',
+            sender: 'assistant',
+            timestamp: new Date().toISOString()
+        });
+        messageDiv.classList.add('streaming');
+        messagesArea.appendChild(messageDiv);
+        updateMessageFading();
+    }
+    
+    messageDiv.querySelector('.message-content').textContent += delta.delta;
+}
+
+function showReminder(todo) {
+    // Reminders are shown locally and are not part of the saved conversation
+    displayMessage({
+        id: `reminder-${todo.id}-${todo.due_date}`,
+        content: `Reminder: "${todo.title}" is due now.`,
+        sender: 'system',
+        timestamp: new Date().toISOString()
+    });
+}
+
+function findMessageElement(messageId) {
+    return messagesArea.querySelector(`[data-message-id="${CSS.escape(messageId)}"]`);
+}
+
+function createMessageElement(message) {
     const messageDiv = document.createElement('div');
     messageDiv.className = `message ${message.sender}`;
     messageDiv.setAttribute('data-message-id', message.id);
@@ -109,15 +218,7 @@ function displayMessage(message) {
     messageDiv.appendChild(contentDiv);
     messageDiv.appendChild(timeDiv);
     
-    messagesArea.appendChild(messageDiv);
-    
-    // Stop processing after assistant message
-    if (message.sender === 'assistant') {
-        setProcessing(false);
-    }
-    
-    // Update fading effect
-    updateMessageFading();
+    return messageDiv;
 }
 
 function showTypingIndicator() {
@@ -146,6 +247,36 @@ function hideTypingIndicator() {
     }
 }
 
+function applyTodoSync(sync) {
+    if (sync.snapshot) {
+        todosById = new Map(sync.snapshot.todos.map(todo => [todo.id, todo]));
+        todoEpoch = sync.snapshot.epoch;
+        todoRevision = sync.snapshot.revision;
+    } else {
+        todoEpoch = sync.epoch;
+        sync.deltas.forEach(delta => applyTodoDelta(delta.event, delta));
+    }
+    updateTodos(Array.from(todosById.values()));
+}
+
+function applyTodoDelta(event, delta) {
+    if (todoRevision === null || delta.revision <= todoRevision) return;
+    
+    if (delta.revision !== todoRevision + 1) {
+        // Missed a change; ask the server for whatever we don't have
+        socket.emit('sync_todos', { todo_epoch: todoEpoch, todo_revision: todoRevision });
+        return;
+    }
+    
+    if (event === 'todo_deleted') {
+        todosById.delete(delta.todo_id);
+    } else {
+        todosById.set(delta.todo.id, delta.todo);
+    }
+    todoRevision = delta.revision;
+    updateTodos(Array.from(todosById.values()));
+}
+
 function updateTodos(todos) {
     // Update debug panel if visible
     if (todosDebug.style.display !== 'none') {
@@ -209,8 +340,13 @@ function formatDate(date) {
     });
 }
 
-// Scroll event for fading effect
-messagesArea.addEventListener('scroll', updateMessageFading);
+// Scroll event for fading effect and loading older history
+messagesArea.addEventListener('scroll', function() {
+    updateMessageFading();
+    if (messagesArea.scrollTop < 50) {
+        loadOlderMessages();
+    }
+});
 
 // Debug toggle (press 'd' key)
 document.addEventListener('keydown', function(e) {
@@ -0,0 +1,43 @@
+import pytest
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # Storage paths are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('CLAUDE_API_KEY', 'test')
+    import app
+    yield app
+    app.workspaces.close_all()
+
+def test_failed_connect_unpins_workspace(app_module, monkeypatch):
+    def broken_history(workspace, *args, **kwargs):
+        raise RuntimeError("storage unavailable")
+    monkeypatch.setattr(app_module, 'load_history_page', broken_history)
+
+    with pytest.raises(RuntimeError):
+        app_module.socketio.test_client(app_module.app, auth={'workspace': 'team'})
+
+    workspace = app_module.workspaces.peek('team')
+    assert workspace is not None and workspace.users == 0
+    assert app_module.client_workspaces == {}
+
+@pytest.mark.parametrize("revision", ["0", 0.0, True, None, [0]])
+def test_malformed_sync_state_gets_a_snapshot(app_module, revision):
+    workspace = app_module.workspaces.acquire('team')
+    try:
+        state = {'todo_epoch': workspace.todo_sync.epoch, 'todo_revision': revision}
+        assert 'snapshot' in app_module.todo_catch_up(workspace, state)
+        state['todo_revision'] = 0
+        assert app_module.todo_catch_up(workspace, state) == {'epoch': workspace.todo_sync.epoch, 'deltas': []}
+        state['todo_epoch'] = 0
+        assert 'snapshot' in app_module.todo_catch_up(workspace, state)
+    finally:
+        app_module.workspaces.release(workspace)
+
+def test_connect_with_string_revision_succeeds(app_module):
+    client = app_module.socketio.test_client(app_module.app, auth={'workspace': 'team', 'todo_epoch': 'x',
+                                                                   'todo_revision': '0'})
+    initial = [event for event in client.get_received() if event['name'] == 'initial_data']
+    assert 'snapshot' in initial[0]['args'][0]['todo_sync']
+    client.disconnect()
+    assert app_module.workspaces.peek('team').users == 0
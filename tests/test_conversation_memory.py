@@ -0,0 +1,45 @@
+from services.conversation_memory import ConversationMemory
+
+def message(n, sender='user'):
+    return {'id': str(n), 'sender': sender, 'content': f"turn {n}", 'message_type': 'text'}
+
+def queued(memory):
+    return [text for _, _, text in memory._unsummarized]
+
+def test_finish_summary_drops_only_claimed_turns():
+    memory = ConversationMemory(window_messages=2, summarize_batch=2)
+    for n in range(4):
+        memory.add(message(n))
+    summary, turns = memory.begin_summary()
+    assert [text for _, text in turns] == ["turn 0", "turn 1"]
+
+    memory.add(message(4))
+    memory.finish_summary("covers 0 and 1")
+    assert memory.summary == "covers 0 and 1"
+    assert queued(memory) == ["turn 2"]
+
+def test_finish_summary_keeps_newer_turns_after_cap_trims_claimed_ones():
+    memory = ConversationMemory(window_messages=1, summarize_batch=2, max_unsummarized=3)
+    for n in range(4):
+        memory.add(message(n))
+    _, turns = memory.begin_summary()
+    assert [text for _, text in turns] == ["turn 0", "turn 1", "turn 2"]
+
+    # While the summary is in flight the cap pushes claimed turns out of the front
+    for n in range(4, 7):
+        memory.add(message(n))
+    assert queued(memory) == ["turn 3", "turn 4", "turn 5"]
+
+    memory.finish_summary("covers 0 to 2")
+    assert queued(memory) == ["turn 3", "turn 4", "turn 5"]
+
+def test_abort_summary_keeps_turns_queued():
+    memory = ConversationMemory(window_messages=1, summarize_batch=2)
+    for n in range(3):
+        memory.add(message(n))
+    assert memory.begin_summary() is not None
+    assert memory.begin_summary() is None
+
+    memory.abort_summary()
+    assert queued(memory) == ["turn 0", "turn 1"]
+    assert memory.begin_summary() is not None
@@ -0,0 +1,52 @@
+from datetime import datetime
+import pytest
+from services.date_parser import DateParser, _replace_clamped
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_tomorrow_follows_the_clock_across_midnight():
+    clock = FakeClock(datetime(2026, 3, 9, 23, 59))
+    parser = DateParser(clock=clock)
+    assert parser.parse_natural_language_date("tomorrow") == datetime(2026, 3, 10)
+    assert parser.parse_natural_language_date("Tomorrow") == datetime(2026, 3, 10)
+    assert parser.cache_info()['hits'] == 1
+
+    clock.now = datetime(2026, 3, 10, 0, 1)
+    assert parser.parse_natural_language_date("tomorrow") == datetime(2026, 3, 11)
+    assert [span.value for span in parser.extract_date_spans("due tomorrow")] == [datetime(2026, 3, 11)]
+
+def test_cache_evicts_least_recently_used():
+    parser = DateParser(clock=FakeClock(datetime(2026, 3, 9, 12)), cache_size=2)
+    parser.parse_natural_language_date("today")
+    parser.parse_natural_language_date("tomorrow")
+    parser.parse_natural_language_date("today")  # now most recently used
+    parser.parse_natural_language_date("yesterday")  # evicts "tomorrow"
+    assert parser.cache_info() == {'hits': 1, 'misses': 3, 'size': 2}
+
+    parser.parse_natural_language_date("today")
+    assert parser.cache_info()['hits'] == 2
+    parser.parse_natural_language_date("tomorrow")
+    assert parser.cache_info()['misses'] == 4
+
+@pytest.mark.parametrize("value, fields, expected", [
+    (datetime(2026, 1, 31), {'month': 2}, datetime(2026, 2, 28)),
+    (datetime(2028, 1, 31), {'month': 2}, datetime(2028, 2, 29)),
+    (datetime(2026, 3, 31), {'month': 4}, datetime(2026, 4, 30)),
+    (datetime(2028, 2, 29), {'year': 2029}, datetime(2029, 2, 28)),
+    (datetime(2026, 1, 15), {'month': 2}, datetime(2026, 2, 15)),
+])
+def test_replace_clamped_falls_back_to_month_end(value, fields, expected):
+    assert _replace_clamped(value, **fields) == expected
+
+def test_replace_clamped_still_rejects_invalid_months():
+    with pytest.raises(ValueError):
+        _replace_clamped(datetime(2026, 1, 31), month=13)
+
+def test_next_month_from_month_end():
+    parser = DateParser(clock=FakeClock(datetime(2026, 1, 31, 9)))
+    assert [span.value for span in parser.extract_date_spans("by next month")] == [datetime(2026, 2, 28)]
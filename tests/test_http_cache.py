@@ -0,0 +1,63 @@
+import gzip
+from werkzeug.http import parse_accept_header, parse_etags
+from services.http_cache import ResponseCache, choose_encoding, etag_matches
+
+def build_body(cache, size, key='todos', revision=1):
+    return cache.get(key, revision, lambda: {'items': 'x' * size})
+
+def test_etag_matches_any_representation_and_star():
+    body = build_body(ResponseCache(min_compress_size=10), 100)
+    identity, gzip_tag = body.etag_for('identity'), body.etag_for('gzip')
+    assert gzip_tag == identity[:-1] + '-gzip"'
+
+    assert etag_matches(parse_etags(identity), body)
+    assert etag_matches(parse_etags(gzip_tag), body)
+    assert etag_matches(parse_etags(f'W/{gzip_tag}'), body)
+    assert etag_matches(parse_etags(f'"other", {identity}'), body)
+    assert etag_matches(parse_etags('*'), body)
+    assert not etag_matches(parse_etags('"other"'), body)
+    assert not etag_matches(parse_etags(None), body)
+
+    stale = build_body(ResponseCache(min_compress_size=10), 100, revision=2)
+    assert not etag_matches(parse_etags(identity), stale)
+
+def test_small_bodies_are_sent_uncompressed():
+    cache = ResponseCache(min_compress_size=1024)
+    accepts_gzip = parse_accept_header('gzip, deflate')
+
+    small = build_body(cache, 10, key='small')
+    assert small.encodings == ['identity']
+    assert choose_encoding(accepts_gzip, small) == 'identity'
+
+    large = build_body(cache, 4096, key='large')
+    assert choose_encoding(accepts_gzip, large) == 'gzip'
+    assert gzip.decompress(large.encoded('gzip')) == large.body
+    assert choose_encoding(parse_accept_header(''), large) == 'identity'
+    assert choose_encoding(parse_accept_header('identity'), large) == 'identity'
+
+def test_body_is_rebuilt_when_revision_changes():
+    cache = ResponseCache()
+    builds = []
+    def build():
+        builds.append(len(builds))
+        return {'build': len(builds)}
+
+    first = cache.get('todos', 1, build)
+    assert cache.get('todos', 1, build) is first
+    second = cache.get('todos', 2, build)
+
+    assert len(builds) == 2
+    assert second.body == b'{"build":2}' and second.etag != first.etag
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 2}
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_entries=2)
+    build_body(cache, 1, key='a')
+    build_body(cache, 1, key='b')
+    build_body(cache, 1, key='a')
+    build_body(cache, 1, key='c')
+    assert cache.stats()['entries'] == 2
+    build_body(cache, 1, key='a')
+    assert cache.stats()['hits'] == 2
+    build_body(cache, 1, key='b')
+    assert cache.stats()['misses'] == 4
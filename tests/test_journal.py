@@ -0,0 +1,106 @@
+import json
+import os
+import pytest
+import services.journal as journal_module
+from models import Todo, Message, MessageSender
+from services.journal import JournalPersistenceManager
+
+@pytest.fixture
+def open_manager(tmp_path):
+    managers = []
+    def open_manager():
+        manager = JournalPersistenceManager(str(tmp_path), compact_interval=3600)
+        managers.append(manager)
+        return manager
+    yield open_manager
+    for manager in managers:
+        manager._stop.set()
+        manager._wake.set()
+
+def message(content):
+    return Message(content=content, sender=MessageSender.USER)
+
+def titles(manager):
+    return sorted(todo.title for todo in manager.load_todos())
+
+def contents(manager):
+    return [message.content for message in manager.load_messages()]
+
+def test_replays_snapshot_rotated_and_live_journal(open_manager, tmp_path):
+    manager = open_manager()
+    first, second = Todo(title="first"), Todo(title="second")
+    manager.save_todo_changes([first, second], [])
+    manager.append_message(message("in snapshot"))
+    manager.compact()
+
+    manager.append_message(message("in rotated journal"))
+    second.title = "second, renamed"
+    manager.save_todo_changes([second], [first.id])
+    # Rotate by hand, as a compaction that died before writing the snapshot would leave it
+    manager._journal.close()
+    os.replace(manager.journal_file, manager.rotated_journal_file)
+    manager._journal = open(manager.journal_file, 'a', encoding='utf-8')
+
+    manager.append_message(message("in live journal"))
+    manager.save_todo_changes([Todo(title="third")], [])
+
+    replayed = open_manager()
+    assert contents(replayed) == ["in snapshot", "in rotated journal", "in live journal"]
+    assert titles(replayed) == ["second, renamed", "third"]
+
+def test_skips_torn_last_line(open_manager, tmp_path):
+    manager = open_manager()
+    manager.save_todo_changes([Todo(title="kept")], [])
+    manager.append_message(message("kept"))
+    manager._journal.close()
+    with open(manager.journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"op":"message","data":{"id":"torn","cont')
+
+    replayed = open_manager()
+    assert contents(replayed) == ["kept"]
+    assert titles(replayed) == ["kept"]
+
+    # Appends after the torn line start on a fresh line and replay normally
+    replayed.append_message(message("after torn line"))
+    assert contents(open_manager()) == ["kept", "after torn line"]
+
+def test_compaction_failing_partway_loses_nothing(open_manager, tmp_path, monkeypatch):
+    manager = open_manager()
+    manager.save_todo_changes([Todo(title="before")], [])
+    manager.append_message(message("before"))
+
+    write = journal_module.write_bytes_atomic
+    def fail_on_todos(path, data):
+        if path == manager.todos_file:
+            raise OSError("disk full")
+        return write(path, data)
+    monkeypatch.setattr(journal_module, "write_bytes_atomic", fail_on_todos)
+    manager.compact()
+    assert os.path.exists(manager.rotated_journal_file)
+
+    manager.save_todo_changes([Todo(title="after")], [])
+    assert titles(open_manager()) == ["after", "before"]
+
+    # The next compaction folds the leftover rotated journal in as well
+    monkeypatch.setattr(journal_module, "write_bytes_atomic", write)
+    manager.compact()
+    assert not os.path.exists(manager.rotated_journal_file)
+    with open(manager.todos_file, encoding='utf-8') as f:
+        assert sorted(todo['title'] for todo in json.load(f)) == ["after", "before"]
+    replayed = open_manager()
+    assert titles(replayed) == ["after", "before"]
+    assert contents(replayed) == ["before"]
+
+def test_rewritten_history_is_journaled_as_reset(open_manager, tmp_path):
+    manager = open_manager()
+    first, second, third = message("one"), message("two"), message("three")
+    manager.save_messages([first, second])
+    manager.save_messages([first, third])
+    assert contents(manager) == ["one", "three"]
+
+    with open(manager.journal_file, encoding='utf-8') as f:
+        ops = [json.loads(line)['op'] for line in f]
+    assert ops == ["message", "message", "messages_reset"]
+
+    manager.append_message(message("four"))
+    assert contents(open_manager()) == ["one", "three", "four"]
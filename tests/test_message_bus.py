@@ -0,0 +1,83 @@
+import threading
+import time
+from services.message_bus import LocalSocketMessageBus, RESYNC_EVENT
+
+def collect(bus):
+    received = []
+    arrived = threading.Condition()
+    def handler(event, data, local):
+        if not local:
+            with arrived:
+                received.append((event, data))
+                arrived.notify_all()
+    bus.subscribe(handler)
+    return received, arrived
+
+def wait_for(received, arrived, count, timeout=5):
+    with arrived:
+        assert arrived.wait_for(lambda: len(received) >= count, timeout)
+    return list(received)
+
+def test_event_reaches_other_worker(tmp_path):
+    sender, receiver = LocalSocketMessageBus(str(tmp_path)), LocalSocketMessageBus(str(tmp_path))
+    try:
+        received, arrived = collect(receiver)
+        sender.publish('new_message', {'workspace': 'w', 'data': {'id': '1'}}, resync_scope='w')
+        assert wait_for(received, arrived, 1) == [('new_message', {'workspace': 'w', 'data': {'id': '1'}})]
+    finally:
+        sender.close()
+        receiver.close()
+
+def test_oversized_event_becomes_resync(tmp_path):
+    sender, receiver = LocalSocketMessageBus(str(tmp_path)), LocalSocketMessageBus(str(tmp_path))
+    try:
+        received, arrived = collect(receiver)
+        sender.max_payload = 200
+        sender.publish('message_delta', {'text': 'x' * 500})
+        sender.publish('todo_changes', {'workspace': 'w', 'data': {'text': 'x' * 500}}, resync_scope='w')
+        assert wait_for(received, arrived, 1) == [(RESYNC_EVENT, {'scope': 'w', 'missed': ['todo_changes']})]
+    finally:
+        sender.close()
+        receiver.close()
+
+def test_full_peer_queue_neither_blocks_nor_loses_events(tmp_path):
+    sender, receiver = LocalSocketMessageBus(str(tmp_path)), LocalSocketMessageBus(str(tmp_path))
+    try:
+        gate = threading.Event()
+        receiver.subscribe(lambda event, data, local: gate.wait(5))
+        received, arrived = collect(receiver)
+
+        # The reader is stuck in the first handler, so the peer's queue fills up
+        started = time.monotonic()
+        for i in range(50):
+            sender.publish('new_message', {'n': i}, resync_scope='w')
+        assert time.monotonic() - started < 1
+        assert sender._backlogs
+
+        gate.set()
+        events = wait_for(received, arrived, 50)
+        assert [data['n'] for _, data in events] == list(range(50))
+    finally:
+        sender.close()
+        receiver.close()
+
+def test_backlog_overflow_becomes_resync(tmp_path):
+    sender, receiver = LocalSocketMessageBus(str(tmp_path)), LocalSocketMessageBus(str(tmp_path))
+    try:
+        gate = threading.Event()
+        receiver.subscribe(lambda event, data, local: gate.wait(5))
+        received, arrived = collect(receiver)
+        sender.MAX_BACKLOG = 4
+
+        for i in range(100):
+            sender.publish('todo_changes', {'n': i}, resync_scope='w')
+            sender.publish('message_delta', {'n': i})
+
+        gate.set()
+        resync = (RESYNC_EVENT, {'scope': 'w', 'missed': ['todo_changes']})
+        with arrived:
+            assert arrived.wait_for(lambda: resync in received, 5)
+        assert len(received) < 200
+    finally:
+        sender.close()
+        receiver.close()
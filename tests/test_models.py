@@ -0,0 +1,53 @@
+import copy
+import json
+from datetime import datetime
+from models import Todo, TodoPriority, TodoStatus, Message, MessageSender, decode_todos, encode_todos
+
+def test_mark_completed_refreshes_serialized_forms():
+    todo = Todo(title="ship it")
+    assert json.loads(todo.to_json())['status'] == "pending"
+    assert todo.to_dict()['completed_date'] is None
+
+    todo.mark_completed()
+    assert json.loads(todo.to_json())['status'] == "completed"
+    assert todo.to_dict()['completed_date'] == todo.completed_date.isoformat()
+
+    todo.mark_pending()
+    assert todo.to_dict()['status'] == "pending"
+    assert json.loads(todo.to_json())['completed_date'] is None
+
+def test_field_assignment_refreshes_serialized_forms():
+    todo = Todo(title="draft")
+    todo.to_json()
+
+    todo.title = "final"
+    todo.priority = TodoPriority.URGENT
+    todo.due_date = datetime(2026, 3, 9, 17)
+    assert json.loads(todo.to_json()) == todo.to_dict()
+    assert todo.to_dict()['title'] == "final"
+    assert todo.to_dict()['priority'] == "urgent"
+    assert todo.to_dict()['due_date'] == "2026-03-09T17:00:00"
+
+def test_changing_a_copy_leaves_the_original_cache_alone():
+    original = Todo(title="original")
+    cached = original.to_json()
+
+    clone = copy.copy(original)
+    assert clone == original and clone.to_json() == cached
+    clone.title = "clone"
+    clone.mark_completed()
+
+    assert original.to_json() == cached
+    assert original.title == "original" and original.status == TodoStatus.PENDING
+    assert json.loads(clone.to_json())['title'] == "clone"
+
+def test_decoded_records_match_constructed_ones():
+    todo = Todo(title="t", description="d", due_date=datetime(2026, 1, 2), priority=TodoPriority.HIGH)
+    todo.mark_completed()
+    assert decode_todos(encode_todos([todo])) == [todo]
+    assert Todo.from_dict(todo.to_dict()) == todo
+    assert Todo.from_dict(todo.to_dict()).to_json() == todo.to_json()
+
+    message = Message(content="hi", sender=MessageSender.USER)
+    assert Message.from_dict(message.to_dict()) == message
+    assert copy.copy(message).to_json() == message.to_json()
@@ -0,0 +1,45 @@
+import services.persistence as persistence_module
+from models import Todo
+from services.persistence import PersistenceManager
+
+def test_read_cache_survives_replace_during_read(tmp_path, monkeypatch):
+    """A save by another worker landing mid-read must not be cached as the old data"""
+    a = PersistenceManager(str(tmp_path))
+    b = PersistenceManager(str(tmp_path))
+    b.save_todos([Todo(title="one")])
+
+    decode = persistence_module.decode_todos
+    def decode_then_replace(data):
+        # B's atomic replace lands after A has read the old bytes
+        monkeypatch.setattr(persistence_module, "decode_todos", decode)
+        b.save_todo_changes([Todo(title="from B")], [])
+        return decode(data)
+    monkeypatch.setattr(persistence_module, "decode_todos", decode_then_replace)
+
+    assert [todo.title for todo in a.load_todos()] == ["one"]
+    a.save_todo_changes([Todo(title="from A")], [])
+
+    titles = [todo.title for todo in PersistenceManager(str(tmp_path)).load_todos()]
+    assert titles == ["one", "from B", "from A"]
+
+def test_save_refreshes_cache_without_rereading(tmp_path):
+    manager = PersistenceManager(str(tmp_path))
+    manager.save_todos([Todo(title="one")])
+    misses = manager.cache_misses
+
+    assert [todo.title for todo in manager.load_todos()] == ["one"]
+    assert manager.cache_misses == misses
+
+def test_closed_write_behind_manager_is_released(tmp_path):
+    import gc
+    import weakref
+
+    manager = PersistenceManager(str(tmp_path), write_behind_interval=60)
+    manager.save_todos([Todo(title="pending")])
+    manager.close()
+    ref = weakref.ref(manager)
+    del manager
+    gc.collect()
+
+    assert ref() is None
+    assert [todo.title for todo in PersistenceManager(str(tmp_path)).load_todos()] == ["pending"]
@@ -0,0 +1,50 @@
+import json
+from datetime import datetime, timedelta
+from models import Todo, TodoPriority
+from services.prompt_builder import TodoPromptBuilder
+
+def todo_lines(state):
+    return [json.loads(line) for line in state.text.splitlines() if line.startswith('{')]
+
+def completed(title, minutes_ago):
+    todo = Todo(title=title)
+    todo.mark_completed()
+    todo.completed_date = datetime(2026, 3, 9) - timedelta(minutes=minutes_ago)
+    return todo
+
+def test_open_todos_rank_ahead_of_completed():
+    todos = [
+        completed("done long ago", 60),
+        Todo(title="low", priority=TodoPriority.LOW),
+        completed("done just now", 1),
+        Todo(title="urgent later", priority=TodoPriority.URGENT, due_date=datetime(2026, 3, 12)),
+        Todo(title="urgent sooner", priority=TodoPriority.URGENT, due_date=datetime(2026, 3, 10)),
+    ]
+    state = TodoPromptBuilder().build(todos)
+
+    assert [line['t'] for line in todo_lines(state)] == [
+        "urgent sooner", "urgent later", "low", "done just now", "done long ago"]
+    assert todo_lines(state)[1]['due'] == "2026-03-12"
+    assert not state.truncated and state.included == 5
+
+def test_only_recent_completed_todos_are_listed():
+    todos = [completed(f"done {i}", i) for i in range(4)] + [Todo(title="open")]
+    state = TodoPromptBuilder(recent_completed=2).build(todos)
+
+    assert [line['t'] for line in todo_lines(state)] == ["open", "done 0", "done 1"]
+    assert (state.included, state.omitted_open, state.omitted_completed) == (3, 0, 2)
+    assert state.text.endswith("(2 older completed todos not shown)")
+
+def test_budget_overflow_counts_omitted_todos():
+    todos = [Todo(title=f"open todo number {i}", description="x" * 80) for i in range(10)]
+    todos += [completed("finished", 5)]
+    builder = TodoPromptBuilder(token_budget=150)
+    state = builder.build(todos)
+
+    shown = len(todo_lines(state))
+    assert 0 < shown < 10
+    assert state.included == shown
+    assert (state.omitted_open, state.omitted_completed) == (10 - shown, 1)
+    assert state.truncated
+    assert state.text.endswith(f"({10 - shown} lower-priority open todos and 1 older completed todo not shown)")
+    assert state.estimated_tokens <= builder.token_budget
@@ -0,0 +1,65 @@
+import threading
+from datetime import datetime, timedelta
+from models import Todo
+from services.reminders import ReminderScheduler
+
+NOW = datetime(2026, 3, 9, 12)
+
+def scheduler(on_due=lambda todo: None, clock=lambda: NOW):
+    return ReminderScheduler(on_due, clock=clock)
+
+def test_reschedule_leaves_a_stale_entry_that_is_skipped():
+    reminders = scheduler()
+    todo = Todo(title="move me", due_date=NOW + timedelta(hours=1))
+    other = Todo(title="other", due_date=NOW + timedelta(hours=2))
+    reminders.rebuild([todo, other])
+
+    todo.due_date = NOW + timedelta(hours=3)
+    reminders.schedule(todo)
+    assert len(reminders._heap) == 3
+    assert reminders.next_deadline() == NOW + timedelta(hours=2)
+    # The stale one-hour entry is dropped once it reaches the top
+    assert len(reminders._heap) == 2
+
+    # Moving back to the original time revives a fresh entry, not the dropped one
+    todo.due_date = NOW + timedelta(hours=1)
+    reminders.schedule(todo)
+    assert reminders.next_deadline() == NOW + timedelta(hours=1)
+
+def test_cancel_and_completion_drop_reminders():
+    reminders = scheduler()
+    cancelled = Todo(title="cancelled", due_date=NOW + timedelta(hours=1))
+    completed = Todo(title="completed", due_date=NOW + timedelta(hours=2))
+    past = Todo(title="past", due_date=NOW - timedelta(hours=1))
+    kept = Todo(title="kept", due_date=NOW + timedelta(hours=3))
+    reminders.apply_changes([cancelled, completed, past, kept], [])
+
+    completed.mark_completed()
+    reminders.apply_changes([completed], [cancelled.id])
+    assert reminders.next_deadline() == NOW + timedelta(hours=3)
+    assert list(reminders._scheduled) == [kept.id]
+
+def test_fires_only_the_live_deadline():
+    fired = []
+    done = threading.Event()
+    def on_due(todo):
+        fired.append(todo.title)
+        done.set()
+
+    reminders = scheduler(on_due, clock=datetime.now)
+    todo = Todo(title="first", due_date=datetime.now() + timedelta(milliseconds=100))
+    reminders.schedule(todo)
+    todo.due_date = datetime.now() + timedelta(milliseconds=200)
+    todo.title = "moved"
+    reminders.schedule(todo)
+    cancelled = Todo(title="cancelled", due_date=datetime.now() + timedelta(milliseconds=50))
+    reminders.schedule(cancelled)
+    reminders.cancel(cancelled.id)
+
+    reminders.start()
+    try:
+        assert done.wait(5)
+    finally:
+        reminders.stop()
+    assert fired == ["moved"]
+    assert reminders.next_deadline() is None
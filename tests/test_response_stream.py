@@ -0,0 +1,32 @@
+import pytest
+from services.response_stream import ResponseStreamParser, TODO_UPDATES_MARKER
+
+def stream(chunks):
+    parser = ResponseStreamParser()
+    shown = [parser.feed(chunk) for chunk in chunks]
+    shown.append(parser.finish())
+    return parser, shown
+
+@pytest.mark.parametrize("split", range(1, len(TODO_UPDATES_MARKER)))
+def test_marker_split_across_chunks_is_never_shown(split):
+    reply = f"Done.\n{TODO_UPDATES_MARKER} [{{\"action\": \"add\"}}]"
+    cut = reply.index(TODO_UPDATES_MARKER) + split
+    parser, shown = stream([reply[:cut], reply[cut:]])
+
+    assert "".join(shown) == "Done.\n"
+    assert parser.marker_seen
+    assert parser.text == reply
+
+def test_marker_split_over_many_single_character_chunks():
+    reply = f"Sure{TODO_UPDATES_MARKER}[]"
+    parser, shown = stream(list(reply))
+    assert "".join(shown) == "Sure"
+    assert parser.marker_seen
+
+def test_marker_prefix_that_is_not_the_marker_is_released():
+    parser = ResponseStreamParser()
+    assert parser.feed("see TODO") == "see "
+    assert parser.feed("_ITEMS") == "TODO_ITEMS"
+    assert parser.feed(" then TODO_") == " then "
+    assert parser.finish() == "TODO_"
+    assert not parser.marker_seen
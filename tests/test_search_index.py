@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from models import Todo, Message, MessageSender
+from services.persistence import PersistenceManager
+from services.search_index import SearchIndex, SearchIndexedPersistence
+
+def message(content, minutes=0, id=None):
+    kwargs = {'id': id} if id else {}
+    return Message(content=content, sender=MessageSender.USER,
+                   timestamp=datetime(2026, 3, 9) + timedelta(minutes=minutes), **kwargs)
+
+def ids(records):
+    return [record.id for record in records]
+
+def test_reindexes_changed_text():
+    index = SearchIndex()
+    todo = Todo(title="buy milk")
+    index.upsert(todo)
+    assert ids(index.search("milk")) == [todo.id]
+
+    todo.title = "buy bread"
+    index.upsert(todo)
+    assert index.search("milk") == []
+    assert ids(index.search("bread")) == [todo.id]
+    # The index keeps its own copy, so later edits don't leak in unindexed
+    todo.title = "buy cheese"
+    assert index.search("bread")[0].title == "buy bread"
+
+def test_remove_and_sync_drop_stale_documents():
+    index = SearchIndex()
+    first, second, third = Todo(title="alpha task"), Todo(title="beta task"), Todo(title="gamma task")
+    note = message("a task in chat")
+    index.rebuild([note], [first, second, third])
+
+    index.remove('todo', first.id)
+    assert set(ids(index.search("task"))) == {second.id, third.id, note.id}
+
+    index.sync('todo', [third])
+    assert set(ids(index.search("task"))) == {third.id, note.id}
+    assert index.search("beta") == []
+    assert len(index) == 2
+
+def test_only_last_term_matches_as_prefix():
+    index = SearchIndex()
+    meeting, meet = message("team meeting notes"), message("meet the team")
+    index.rebuild([meeting, meet], [])
+
+    assert set(ids(index.search("team mee"))) == {meeting.id, meet.id}
+    assert ids(index.search("meeting te")) == [meeting.id]
+    assert index.search("mee team") == []
+    assert index.search("   ") == []
+
+def test_kinds_filter_and_newest_first():
+    index = SearchIndex()
+    older, newer = message("report draft", 0), message("report final", 5)
+    todo = Todo(title="report review")
+    index.rebuild([older, newer], [todo])
+
+    assert ids(index.search("report")) == [todo.id, newer.id, older.id]
+    assert ids(index.search("report", kinds=['message'])) == [newer.id, older.id]
+    assert ids(index.search("report", kinds=['todo'])) == [todo.id]
+    assert ids(index.search("report", limit=2)) == [todo.id, newer.id]
+
+def test_indexed_persistence_keeps_index_current(tmp_path):
+    index = SearchIndex()
+    store = SearchIndexedPersistence(PersistenceManager(str(tmp_path)), index)
+    todo = Todo(title="water plants")
+    store.save_todo_changes([todo], [])
+    store.append_message(message("plants look dry"))
+    assert len(index.search("plants")) == 2
+
+    store.save_todo_changes([], [todo.id])
+    assert ids(index.search("plants", kinds=['todo'])) == []
+    assert [todo.title for todo in store.load_todos()] == []
+
+    reopened = SearchIndex()
+    SearchIndexedPersistence(PersistenceManager(str(tmp_path)), reopened)
+    assert len(reopened.search("plants")) == 1
@@ -0,0 +1,108 @@
+import os
+import threading
+import pytest
+from datetime import datetime, timedelta
+from models import Todo, Message, MessageSender, TodoStatus
+from services.persistence import page_messages
+from services.sqlite_persistence import SQLitePersistence
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLitePersistence(str(tmp_path))
+    yield store
+    store.close()
+
+def make_messages(count):
+    start = datetime(2026, 1, 1)
+    return [Message(content=f"message {i}", sender=MessageSender.USER, id=f"m{i}",
+                    timestamp=start + timedelta(minutes=i)) for i in range(count)]
+
+def ids(records):
+    return [record.id for record in records]
+
+def test_load_message_page_matches_in_memory_paging(store):
+    messages = make_messages(7)
+    store.save_messages(messages)
+
+    for before_id in (None, "m0", "m1", "m3", "m6", "unknown"):
+        for limit in (1, 3, 7, 10):
+            page, has_more = store.load_message_page(before_id, limit)
+            expected, expected_more = page_messages(messages, before_id, limit)
+            assert (ids(page), has_more) == (ids(expected), expected_more), (before_id, limit)
+
+def test_load_message_page_walks_back_through_history(store):
+    messages = make_messages(5)
+    for message in messages:
+        store.append_message(message)
+
+    page, has_more = store.load_message_page(limit=2)
+    assert (ids(page), has_more) == (["m3", "m4"], True)
+    page, has_more = store.load_message_page(page[0].id, limit=2)
+    assert (ids(page), has_more) == (["m1", "m2"], True)
+    page, has_more = store.load_message_page(page[0].id, limit=2)
+    assert (ids(page), has_more) == (["m0"], False)
+    assert page[0] == messages[0]
+
+def test_save_todo_changes_updates_in_place_appends_and_deletes(store):
+    first, second, third = Todo(title="first"), Todo(title="second"), Todo(title="third")
+    store.save_todos([first, second, third])
+
+    second.title = "second, renamed"
+    second.mark_completed()
+    fourth = Todo(title="fourth")
+    store.save_todo_changes([fourth, second], [first.id, "unknown"])
+
+    todos = store.load_todos()
+    assert [todo.title for todo in todos] == ["second, renamed", "third", "fourth"]
+    assert todos[0].status == TodoStatus.COMPLETED
+    assert todos[0] == second
+
+def test_save_todo_changes_is_one_transaction(store, monkeypatch):
+    kept = Todo(title="kept")
+    store.save_todos([kept])
+
+    bad = Todo(title="bad")
+    row = store._todo_to_row
+    # A NULL title violates the schema, so the whole change set must roll back
+    monkeypatch.setattr(store, "_todo_to_row", lambda todo: (todo.id, None) + row(todo)[2:] if todo is bad else row(todo))
+    store.save_todo_changes([Todo(title="new"), bad], [kept.id])
+
+    assert [todo.title for todo in store.load_todos()] == ["kept"]
+
+def open_db_files():
+    fd_dir = "/proc/self/fd"
+    names = []
+    for fd in os.listdir(fd_dir):
+        try:
+            names.append(os.readlink(os.path.join(fd_dir, fd)))
+        except OSError:
+            pass
+    return [name for name in names if "todo_app.db" in name]
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to list open files")
+def test_close_closes_connections_of_all_threads(tmp_path):
+    store = SQLitePersistence(str(tmp_path))
+    store.save_todos([Todo(title="one")])
+    baseline = len(open_db_files())
+
+    ready = threading.Barrier(6)
+    done = threading.Event()
+    def reader():
+        store.load_todos()
+        ready.wait()
+        done.wait()
+    threads = [threading.Thread(target=reader) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    assert len(open_db_files()) > baseline
+
+    store.close()
+    assert open_db_files() == []
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    # The store reopens a connection if it is used again
+    assert [todo.title for todo in store.load_todos()] == ["one"]
+    store.close()
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from models import Todo, TodoPriority, TodoStatus
+from services.todo_index import TodoIndex
+
+BASE = datetime(2026, 3, 9, 12)
+
+def titles(todos):
+    return [todo.title for todo in todos]
+
+def test_upsert_moves_todo_between_indexes():
+    todo = Todo(title="move", priority=TodoPriority.LOW, due_date=BASE)
+    index = TodoIndex([todo, Todo(title="other")])
+
+    todo.mark_completed()
+    todo.priority = TodoPriority.URGENT
+    todo.due_date = BASE + timedelta(days=2)
+    index.upsert(todo)
+
+    assert titles(index.query(statuses=[TodoStatus.PENDING])) == ["other"]
+    assert titles(index.query(statuses=[TodoStatus.COMPLETED])) == ["move"]
+    assert index.query(priorities=[TodoPriority.LOW]) == []
+    assert titles(index.query(priorities=[TodoPriority.URGENT])) == ["move"]
+    assert index.query(due_before=BASE + timedelta(days=1)) == []
+    assert index._due == [(BASE + timedelta(days=2), todo.id)]
+    assert all(todo.id not in ids for status, ids in index._by_status.items() if status != TodoStatus.COMPLETED)
+
+    todo.due_date = None
+    index.upsert(todo)
+    assert index._due == []
+    index.remove(todo.id)
+    assert titles(index.query()) == ["other"]
+    assert all(todo.id not in ids for ids in index._by_priority.values())
+
+def test_due_range_mixes_aware_and_naive_dates():
+    local_aware = (BASE + timedelta(hours=1)).astimezone()
+    utc_aware = (BASE + timedelta(hours=3)).astimezone(timezone.utc)
+    index = TodoIndex([
+        Todo(title="naive", due_date=BASE),
+        Todo(title="aware local", due_date=local_aware),
+        Todo(title="aware utc", due_date=utc_aware),
+        Todo(title="no date"),
+    ])
+
+    # due_after is inclusive and due_before exclusive
+    assert titles(index.query(due_after=BASE, due_before=BASE + timedelta(hours=2))) == ["naive", "aware local"]
+    assert titles(index.query(due_after=(BASE + timedelta(minutes=30)).astimezone(timezone.utc))) == [
+        "aware local", "aware utc"]
+    assert titles(index.query(due_before=BASE + timedelta(hours=1))) == ["naive"]
+
+def test_sorts_on_several_keys_and_limits():
+    index = TodoIndex([
+        Todo(title="b", priority=TodoPriority.HIGH, due_date=BASE + timedelta(days=2)),
+        Todo(title="a", priority=TodoPriority.LOW, due_date=BASE),
+        Todo(title="c", priority=TodoPriority.HIGH, due_date=BASE + timedelta(days=1)),
+        Todo(title="d", priority=TodoPriority.HIGH),
+    ])
+
+    assert titles(index.query(sort=['priority', 'due'])) == ["c", "b", "d", "a"]
+    assert titles(index.query(sort=['priority', '-title'])) == ["d", "c", "b", "a"]
+    assert titles(index.query(sort=['-priority'])) == ["a", "b", "c", "d"]
+    assert titles(index.query(sort=['due'], limit=2)) == ["a", "c"]
+    assert titles(index.query(priorities=[TodoPriority.HIGH], limit=1)) == ["b"]
+
+def test_equal_keys_keep_insertion_order():
+    todos = [Todo(title=f"same {i}", priority=TodoPriority.MEDIUM) for i in range(6)]
+    index = TodoIndex(todos[:3])
+    for todo in todos[3:]:
+        index.upsert(todo)
+    # Updating a todo keeps its place
+    todos[1].description = "edited"
+    index.upsert(todos[1])
+
+    expected = [todo.title for todo in todos]
+    assert titles(index.query(sort=['priority'])) == expected
+    assert titles(index.query(statuses=[TodoStatus.PENDING], sort=['-priority'])) == expected
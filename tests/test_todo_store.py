@@ -0,0 +1,55 @@
+from datetime import datetime
+from models import Todo, TodoUpdate, TodoPriority, TodoStatus
+from services.todo_store import TodoStore, UpdateOutcome, summarize_results
+
+def outcomes(results):
+    return [result.outcome for result in results]
+
+def test_each_update_reports_its_outcome():
+    todo = Todo(title="write tests", priority=TodoPriority.LOW)
+    store = TodoStore([todo])
+
+    results = store.apply([
+        TodoUpdate(action="complete", todo_id=todo.id),
+        TodoUpdate(action="complete", todo_id=todo.id),
+        TodoUpdate(action="update", todo_id=todo.id, priority=TodoPriority.LOW),
+        TodoUpdate(action="update", todo_id=todo.id, title="write more tests"),
+        TodoUpdate(action="delete", todo_id="missing"),
+        TodoUpdate(action="update"),
+        TodoUpdate(action="rename", todo_id=todo.id),
+    ])
+    assert outcomes(results) == [
+        UpdateOutcome.APPLIED, UpdateOutcome.NO_OP, UpdateOutcome.NO_OP, UpdateOutcome.APPLIED,
+        UpdateOutcome.UNKNOWN_ID, UpdateOutcome.INVALID, UpdateOutcome.INVALID,
+    ]
+    assert todo.status == TodoStatus.COMPLETED
+    assert todo.title == "write more tests"
+    assert results[4].todo is None
+
+def test_add_then_delete_in_one_batch_leaves_nothing_to_save():
+    store = TodoStore()
+    added = store.apply_one(TodoUpdate(action="add", title="temporary", due_date=datetime(2026, 3, 9)))
+    assert added.applied and added.todo.id in store
+
+    results = [added, store.apply_one(TodoUpdate(action="delete", todo_id=added.todo.id))]
+    assert len(store) == 0
+    assert results[1].todo is added.todo
+
+    changed, deleted_ids = summarize_results(results)
+    assert changed == []
+    assert deleted_ids == [added.todo.id]
+
+def test_summarize_reports_each_todo_once_in_its_final_state():
+    kept, removed = Todo(title="kept"), Todo(title="removed")
+    store = TodoStore([kept, removed])
+    results = store.apply([
+        TodoUpdate(action="update", todo_id=kept.id, title="renamed"),
+        TodoUpdate(action="complete", todo_id=kept.id),
+        TodoUpdate(action="delete", todo_id=removed.id),
+        TodoUpdate(action="complete", todo_id="missing"),
+    ])
+
+    changed, deleted_ids = summarize_results(results)
+    assert changed == [kept]
+    assert deleted_ids == [removed.id]
+    assert [todo.id for todo in store.todos()] == [kept.id]
@@ -0,0 +1,40 @@
+from models import Todo
+from services.todo_sync import TodoSyncLog
+
+def record_changes(log, count):
+    return log.record([Todo(title=f"todo {i}") for i in range(count)], [])
+
+def test_returns_deltas_inside_the_window():
+    log = TodoSyncLog(max_deltas=10)
+    record_changes(log, 3)
+    deleted = Todo(title="gone")
+    log.record([], [deleted.id])
+
+    deltas = log.deltas_since(log.epoch, 2)
+    assert [delta.revision for delta in deltas] == [3, 4]
+    assert deltas[-1].to_dict() == {'revision': 4, 'todo_id': deleted.id}
+    assert log.deltas_since(log.epoch, 4) == []
+    assert [delta.revision for delta in log.deltas_since(log.epoch, 0)] == [1, 2, 3, 4]
+
+def test_needs_snapshot_for_other_epoch_or_future_revision():
+    log = TodoSyncLog()
+    record_changes(log, 2)
+    assert log.deltas_since("older-epoch", 1) is None
+    assert log.deltas_since(None, 1) is None
+    assert log.deltas_since(log.epoch, None) is None
+    assert log.deltas_since(log.epoch, 3) is None
+
+def test_needs_snapshot_once_the_window_is_trimmed():
+    log = TodoSyncLog(max_deltas=3)
+    record_changes(log, 5)
+    assert log.deltas_since(log.epoch, 1) is None
+    assert [delta.revision for delta in log.deltas_since(log.epoch, 2)] == [3, 4, 5]
+
+def test_reset_starts_a_new_epoch():
+    log = TodoSyncLog()
+    record_changes(log, 2)
+    epoch = log.epoch
+    log.reset()
+    assert log.epoch != epoch and log.revision == 0
+    assert log.deltas_since(epoch, 2) is None
+    assert log.deltas_since(log.epoch, 0) == []
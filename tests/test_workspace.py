@@ -0,0 +1,76 @@
+import os
+import threading
+import pytest
+from services.conversation_memory import ConversationMemory
+from services.workspace import WorkspaceManager, DEFAULT_WORKSPACE
+
+def test_exists_does_not_create_workspaces(tmp_path):
+    manager = WorkspaceManager(root_dir=str(tmp_path))
+
+    assert manager.exists(DEFAULT_WORKSPACE)
+    assert not manager.exists("never-used")
+    assert not manager.exists("../escape")
+    assert not os.path.exists(os.path.join(tmp_path, "workspaces", "never-used"))
+
+    with manager.using("created"):
+        pass
+    assert manager.exists("created")
+    manager.close_all()
+
+def test_invalid_workspace_id_is_rejected(tmp_path):
+    manager = WorkspaceManager(root_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        manager.acquire("a/b")
+
+def test_slow_load_does_not_block_other_workspaces(tmp_path):
+    loading = threading.Event()
+    unblock = threading.Event()
+    calls = []
+
+    def memory_factory():
+        calls.append(1)
+        if len(calls) == 1:
+            loading.set()
+            assert unblock.wait(5)
+        return ConversationMemory()
+
+    manager = WorkspaceManager(root_dir=str(tmp_path), memory_factory=memory_factory)
+    slow = threading.Thread(target=lambda: manager.release(manager.acquire("slow")))
+    slow.start()
+    assert loading.wait(5)
+
+    # Loads while "slow" is still loading, and deliveries can look workspaces up
+    workspace = manager.acquire("fast")
+    assert manager.peek("fast") is workspace
+    assert manager.peek("slow") is None
+    manager.release(workspace)
+
+    unblock.set()
+    slow.join(5)
+    assert manager.peek("slow") is not None
+    manager.close_all()
+
+def test_concurrent_acquires_load_a_workspace_once(tmp_path):
+    manager = WorkspaceManager(root_dir=str(tmp_path))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.acquire("shared"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(workspace) for workspace in results}) == 1
+    assert results[0].users == 8
+    manager.close_all()
+
+def test_idle_workspaces_are_evicted_least_recently_used_first(tmp_path):
+    manager = WorkspaceManager(root_dir=str(tmp_path), max_loaded=2)
+    pinned = manager.acquire("pinned")
+    for workspace_id in ("a", "b", "c"):
+        with manager.using(workspace_id):
+            pass
+
+    assert {workspace.id for workspace in manager.loaded()} == {"pinned", "c"}
+    assert manager.stats()["evictions"] == 2
+    manager.release(pinned)
+    manager.close_all()